@@ -22,8 +22,22 @@ import numpy as np
 from datetime import datetime, timedelta
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 warnings.filterwarnings('ignore')
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_loads(data):
+    """解析JSON（str或bytes）- 优先使用orjson，可直接解析响应的原始字节"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # =============================================================================
 # API配置
 # =============================================================================
@@ -93,6 +107,16 @@ class TBMAPIClient:
         self.config = APIConfig()
         self.last_request_time = 0
         self.request_interval = 1  # 请求间隔(秒)
+        self.parse_workers = 4  # 历史记录解析线程数
+        
+        # 按特征顺序排列的传输名（FEATURE_MAPPING的插入顺序即特征顺序）
+        self._feat_keys = tuple(self.config.FEATURE_MAPPING.values())
+        self._feat_keys_set = frozenset(self._feat_keys)
+        
+        # 根据固定的特征映射生成专用解析函数（31个传输名直接内联）
+        self._extract = build_feature_extractor(
+            self._feat_keys, tuple(self.config.FEATURE_MAPPING.keys())
+        )
     
     # =========================================================================
     # API调用模块
@@ -144,7 +168,7 @@ class TBMAPIClient:
             
             # 检查响应状态
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 if data.get('code') == 200 and 'data' in data:
                     return data
                 else:
@@ -175,6 +199,10 @@ class TBMAPIClient:
             
         Returns:
             dict: API响应数据，失败返回None
+            
+        Note:
+            接口默认按时间倒序返回（见Supporting-Material/盾构数据查询接口.txt），
+            data[0]即为最新的一条记录
         """
         try:
             # 控制请求频率
@@ -214,7 +242,7 @@ class TBMAPIClient:
             
             # 检查响应状态
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 if data.get('code') == 200 and 'data' in data:
                     return data
                 else:
@@ -243,7 +271,7 @@ class TBMAPIClient:
         """
         try:
             # 解析JSON数据字段
-            data_json = json.loads(record.get('data', '{}'))
+            data_json = _json_loads(record.get('data', '{}'))
             
             # 创建解析结果
             parsed_data = {
@@ -269,49 +297,58 @@ class TBMAPIClient:
             parsed_data (dict): 解析后的数据
             
         Returns:
-            np.ndarray: 31个特征值数组，缺失值用None表示
+            np.ndarray: 31个特征值数组(float64)，缺失值为NaN
         """
-        import numpy as np
-        
         if not parsed_data or 'raw_data' not in parsed_data:
-            return np.full(31, None)
-        
-        raw_data = parsed_data['raw_data']
-        feature_values = np.full(31, None)
-        
-        # 特征名称列表（按顺序）
-        feature_names = [
-            '贯入度', '推进区间的压力（上）', '推进区间的压力（右）', '推进区间的压力（下）', '推进区间的压力（左）',
-            '土舱土压（右）', '土舱土压（右下）', '土舱土压（左）', '土舱土压（左下）',
-            'No.16推进千斤顶速度', 'No.4推进千斤顶速度', 'No.8推进千斤顶速度', 'No.12推进千斤顶速度',
-            '推进油缸总推力', 'No.16推进千斤顶行程', 'No.4推进千斤顶行程', 'No.8推进千斤顶行程', 'No.12推进千斤顶行程',
-            '推进平均速度', '刀盘转速', '刀盘扭矩',
-            'No.1刀盘电机扭矩', 'No.2刀盘电机扭矩', 'No.3刀盘电机扭矩', 'No.4刀盘电机扭矩', 'No.5刀盘电机扭矩',
-            'No.6刀盘电机扭矩', 'No.7刀盘电机扭矩', 'No.8刀盘电机扭矩', 'No.9刀盘电机扭矩', 'No.10刀盘电机扭矩'
-        ]
-        
-        for i, feature_name in enumerate(feature_names):
-            transmission_name = self.config.FEATURE_MAPPING.get(feature_name)
-            
-            if transmission_name and transmission_name in raw_data:
-                # 提取数值部分（去掉单位）
-                value_str = raw_data[transmission_name]
-                try:
-                    # 提取括号前的数值
-                    if '(' in value_str:
-                        numeric_value = float(value_str.split('(')[0])
-                    else:
-                        numeric_value = float(value_str)
-                    feature_values[i] = numeric_value
-                except ValueError:
-                    print(f"⚠️  特征{i+1} ({feature_name}) 数值解析失败: {value_str}")
-                    feature_values[i] = None
-            else:
-                # 没有对应的传输名或数据缺失
-                feature_values[i] = None
+            return np.full(31, np.nan)
+        
+        feature_values = np.full(31, np.nan)
+        self._extract(parsed_data['raw_data'], feature_values)
         
         return feature_values
     
+    def _parse_and_extract(self, record):
+        """
+        解析单条记录并提取特征值（供线程池调用）
+        
+        Args:
+            record (dict): API返回的单条数据记录
+            
+        Returns:
+            tuple: (parsed_data, feature_values)，解析失败返回None
+        """
+        parsed_data = self.parse_data_record(record)
+        if not parsed_data:
+            return None
+        return parsed_data, self.extract_feature_values(parsed_data)
+    
+    def _extract_full_features(self, raw_data):
+        """
+        快速路径: 31个传输名全部存在且均可解析时，一次性向量化转换
+        
+        Args:
+            raw_data (dict): 解析后的原始数据字典
+            
+        Returns:
+            np.ndarray: 31个特征值(float64)，不满足快速路径条件时返回None
+        """
+        if len(raw_data) < 31 or not self._feat_keys_set.issubset(raw_data.keys()):
+            return None
+        
+        vals = [raw_data[k] for k in self._feat_keys]
+        if '' in vals:
+            return None
+        
+        try:
+            # 去掉括号内的单位后整体转换，任一值解析失败则回退到逐个解析
+            return np.fromiter(
+                (v.partition('(')[0] if isinstance(v, str) else v for v in vals),
+                dtype=np.float64,
+                count=31
+            )
+        except (ValueError, TypeError):
+            return None
+    
     # =========================================================================
     # 数据获取接口
     # =========================================================================
@@ -320,7 +357,7 @@ class TBMAPIClient:
         获取最新的31个特征数据 - 获取过去1分钟的数据，选择ID最大的那一条
         
         Returns:
-            np.ndarray: 31个特征值数组，缺失值用None表示
+            np.ndarray: 31个特征值数组(float64)，缺失值为NaN
         """
         # 获取过去1分钟的数据
         api_response = self.fetch_data_by_time_range(
@@ -331,29 +368,33 @@ class TBMAPIClient:
         
         if not api_response or not api_response.get('data'):
             print("❌ 未获取到API数据")
-            return np.full(31, None)
+            return np.full(31, np.nan)
         
         # 获取记录
         records = api_response['data']
         if not records:
             print("❌ API返回空数据")
-            return np.full(31, None)
+            return np.full(31, np.nan)
         
-        # 选择ID最大的记录（最新的）
-        latest_record = max(records, key=lambda x: int(x.get('id', 0)))
+        # 接口按时间倒序返回，第一条即为最新记录
+        latest_record = records[0]
         
         # 解析数据
         parsed_data = self.parse_data_record(latest_record)
         
         if not parsed_data:
             print("❌ 数据解析失败")
-            return np.full(31, None)
+            return np.full(31, np.nan)
         
-        # 提取特征值
-        feature_values = self.extract_feature_values(parsed_data)
+        # 提取特征值（优先走全部有效的快速路径）
+        feature_values = self._extract_full_features(parsed_data['raw_data'])
+        if feature_values is not None:
+            valid_count = 31
+        else:
+            feature_values = self.extract_feature_values(parsed_data)
+            valid_count = int(np.count_nonzero(~np.isnan(feature_values)))
         
         # 统计数据完整性
-        valid_count = np.sum(feature_values != None)
         print(f"📊 获取到 {valid_count}/31 个有效特征值 (记录ID: {latest_record.get('id', 'N/A')})")
         
         if valid_count == 31:
@@ -369,7 +410,7 @@ class TBMAPIClient:
         
         Returns:
             tuple: (feature_values, timestamp_info)
-                - feature_values: 31个特征值数组
+                - feature_values: 31个特征值数组(float64)，缺失值为NaN
                 - timestamp_info: 包含时间戳信息的字典
         """
         # 获取最新数据
@@ -377,7 +418,7 @@ class TBMAPIClient:
         
         if not api_response or not api_response.get('data'):
             print("❌ 未获取到API数据")
-            return np.full(31, None), None
+            return np.full(31, np.nan), None
         
         # 解析数据
         record = api_response['data'][0]
@@ -385,7 +426,7 @@ class TBMAPIClient:
         
         if not parsed_data:
             print("❌ 数据解析失败")
-            return np.full(31, None), None
+            return np.full(31, np.nan), None
         
         # 提取特征值
         feature_values = self.extract_feature_values(parsed_data)
@@ -399,7 +440,7 @@ class TBMAPIClient:
         }
         
         # 统计数据完整性
-        valid_count = np.sum(feature_values != None)
+        valid_count = int(np.count_nonzero(~np.isnan(feature_values)))
         print(f"📊 获取到 {valid_count}/31 个有效特征值")
         
         if valid_count == 31:
@@ -437,22 +478,30 @@ class TBMAPIClient:
             records = api_response['data']
             print(f"📊 获取到 {len(records)} 条历史记录")
             
-            # 解析历史数据
+            # 解析历史数据（各记录的解析与特征提取提交到线程池并行执行）
+            with ThreadPoolExecutor(max_workers=self.parse_workers) as pool:
+                parsed_results = list(pool.map(self._parse_and_extract, records))
+            
+            # 保留原始序号，过滤解析失败的记录
+            parsed_results = [(i, r) for i, r in enumerate(parsed_results) if r]
+            
+            # 有效特征数按二维数组一次性统计（缺失值为NaN）
+            if parsed_results:
+                feats = np.array([r[1] for _, r in parsed_results])
+                valid_counts = (~np.isnan(feats)).sum(axis=1, dtype=np.int32)
+            else:
+                valid_counts = []
+            
             historical_data = []
-            for i, record in enumerate(records):
-                parsed_data = self.parse_data_record(record)
-                if parsed_data:
-                    feature_values = self.extract_feature_values(parsed_data)
-                    valid_count = np.sum(feature_values != None)
-                    
-                    historical_data.append({
-                        'features': feature_values,
-                        'timestamp': parsed_data.get('create_time'),
-                        'record_id': parsed_data.get('id'),
-                        'valid_count': valid_count
-                    })
-                    
-                    print(f"   记录 {i+1}: ID={parsed_data.get('id')}, 有效特征={valid_count}/31")
+            for (i, (parsed_data, feature_values)), valid_count in zip(parsed_results, valid_counts):
+                historical_data.append({
+                    'features': feature_values,
+                    'timestamp': parsed_data.get('create_time'),
+                    'record_id': parsed_data.get('id'),
+                    'valid_count': int(valid_count)
+                })
+                
+                print(f"   记录 {i+1}: ID={parsed_data.get('id')}, 有效特征={valid_count}/31")
             
             # 按时间分组，每分钟只取ID最大的那一条（靠后的）
             time_groups = {}
@@ -496,6 +545,37 @@ class TBMAPIClient:
 # =============================================================================
 # 工具函数
 # =============================================================================
+def build_feature_extractor(feat_keys, feat_names):
+    """
+    生成按固定传输名顺序展开的特征解析函数
+    
+    特征映射在部署期间不会变化，因此在初始化时生成一个将所有
+    raw.get("dateXX") 查找直接内联的函数，避免逐项遍历映射字典。
+    
+    Args:
+        feat_keys (tuple): 按特征顺序排列的传输名
+        feat_names (tuple): 按特征顺序排列的特征名称（用于解析失败提示）
+        
+    Returns:
+        callable: _extract(raw, out)，将解析成功的值写入out对应位置
+    """
+    def _warn(index, value):
+        print(f"⚠️  特征{index+1} ({feat_names[index]}) 数值解析失败: {value}")
+    
+    lines = ["def _extract(raw, out):"]
+    for i, key in enumerate(feat_keys):
+        lines.append(f"    v = raw.get({key!r})")
+        lines.append("    if v is not None:")
+        lines.append("        try:")
+        lines.append(f"            out[{i}] = float(v.partition('(')[0] if isinstance(v, str) else v)")
+        lines.append("        except (ValueError, TypeError):")
+        lines.append(f"            _warn({i}, v)")
+    lines.append("    return out")
+    
+    namespace = {'_warn': _warn}
+    exec(compile("\n".join(lines) + "\n", "<feature_extractor>", "exec"), namespace)
+    return namespace['_extract']
+
 def get_time_range_strings(hours=1):
     """
     获取时间范围字符串
@@ -528,15 +608,16 @@ def test_api_client():
         features = client.get_latest_features()
         
         print(f"特征数据形状: {features.shape}")
-        print(f"有效数据数量: {np.sum(features != None)}")
-        print(f"缺失数据数量: {np.sum(features == None)}")
+        missing = np.isnan(features)
+        print(f"有效数据数量: {np.count_nonzero(~missing)}")
+        print(f"缺失数据数量: {np.count_nonzero(missing)}")
         
         # 显示前10个特征
         print("\n前10个特征值:")
         for i in range(min(10, len(features))):
             value = features[i]
-            status = "✅" if value is not None else "❌"
-            print(f"  特征{i+1:2d}: {value if value is not None else '缺失'} {status}")
+            status = "❌" if missing[i] else "✅"
+            print(f"  特征{i+1:2d}: {'缺失' if missing[i] else value} {status}")
 
 if __name__ == "__main__":
     test_api_client()
@@ -9,14 +9,15 @@ TBM盾构机关键掘进参数实时预测系统 - 后端API服务器
 import os
 import sys
 import json
-import time
-import random
+import logging
 import numpy as np
 from datetime import datetime, timedelta
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, request, send_from_directory
 from flask_cors import CORS
+from fast_kernels import diff_mask
 import threading
-import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加父目录到Python路径，以便导入System-API模块
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'System-API'))
@@ -29,19 +30,61 @@ except ImportError as e:
     print(f"警告: 无法导入API客户端或预测模块: {e}")
     API_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import uvicorn
+    from asgiref.wsgi import WsgiToAsgi
+    ASGI_AVAILABLE = True
+except ImportError:
+    ASGI_AVAILABLE = False
+
+# 请求日志 - 接口请求路径上的输出走logging，默认只输出WARNING及以上
+# 开发调试时可通过环境变量 TBM_API_LOG_LEVEL=INFO 打开每次请求的日志
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv('TBM_API_LOG_LEVEL', 'WARNING').upper())
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                                                datefmt='%Y-%m-%d %H:%M:%S'))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
+
 # Flask应用配置
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求
 
+# ASGI入口（uvicorn/hypercorn部署时使用）
+asgi_app = WsgiToAsgi(app) if ASGI_AVAILABLE else None
+
+def _dumps(payload):
+    """序列化为UTF-8编码的JSON字节串 - 优先使用orjson（C实现，可直接序列化numpy数组）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        payload, ensure_ascii=False,
+        default=lambda o: o.tolist() if isinstance(o, (np.ndarray, np.generic)) else str(o)
+    ).encode('utf-8')
+
+def _json(payload, status=200):
+    """构建JSON响应"""
+    return app.response_class(_dumps(payload), status=status, mimetype='application/json')
+
 # 全局变量
 api_client = None
 model_predictor = None
-data_buffer = queue.Queue(maxsize=10)
+data_buffer = deque(maxlen=10)  # 最近10次数据快照，满时自动丢弃最旧的
+data_lock = threading.Lock()  # 保护last_data与data_buffer的一致性
 last_data = None
+stop_event = threading.Event()  # 通知数据收集线程退出等待
 is_running = False
 
-# 特征配置
-FEATURE_NAMES = [
+# 特征配置（只读元组，按特征索引访问）
+FEATURE_NAMES = (
     '贯入度', '推进区间的压力（上）', '推进区间的压力（右）', '推进区间的压力（下）', '推进区间的压力（左）',
     '土舱土压（右）', '土舱土压（右下）', '土舱土压（左）', '土舱土压（左下）',
     'No.16推进千斤顶速度', 'No.4推进千斤顶速度', 'No.8推进千斤顶速度', 'No.12推进千斤顶速度',
@@ -49,9 +92,9 @@ FEATURE_NAMES = [
     '推进平均速度', '刀盘转速', '刀盘扭矩',
     'No.1刀盘电机扭矩', 'No.2刀盘电机扭矩', 'No.3刀盘电机扭矩', 'No.4刀盘电机扭矩', 'No.5刀盘电机扭矩',
     'No.6刀盘电机扭矩', 'No.7刀盘电机扭矩', 'No.8刀盘电机扭矩', 'No.9刀盘电机扭矩', 'No.10刀盘电机扭矩'
-]
+)
 
-FEATURE_UNITS = [
+FEATURE_UNITS = (
     'MPa', 'MPa', 'MPa', 'MPa', 'MPa',  # 贯入度, 推进压力
     'MPa', 'MPa', 'MPa', 'MPa',  # 土舱土压
     'mm/min', 'mm/min', 'mm/min', 'mm/min',  # 推进千斤顶速度
@@ -59,7 +102,46 @@ FEATURE_UNITS = [
     'mm', 'mm', 'mm', 'mm',  # 推进千斤顶行程
     'mm/min', 'r/min', 'kN·m',  # 推进平均速度, 刀盘转速, 刀盘扭矩
     '%', '%', '%', '%', '%', '%', '%', '%', '%', '%'  # 刀盘电机扭矩
-]
+)
+
+# 特征编号（与/api/tbm-data列式响应中的各数组逐项对应）
+_FEATURE_IDS = list(range(1, len(FEATURE_NAMES) + 1))
+
+# 特征配置接口的响应内容只由上面的常量决定，导入时序列化一次
+_FEATURES_JSON = _dumps({
+    'features': [
+        {'id': i + 1, 'name': name, 'unit': unit}
+        for i, (name, unit) in enumerate(zip(FEATURE_NAMES, FEATURE_UNITS))
+    ]
+})
+
+# 模拟数据取值范围（与FEATURE_NAMES逐项对齐）
+SIM_LO = np.array([0.5]*5 + [0.1]*4 + [10]*4 + [5000] + [100]*4 + [20, 0.5, 1000] + [20]*10, dtype=np.float64)
+SIM_HI = np.array([3.0]*5 + [0.8]*4 + [50]*4 + [15000] + [2000]*4 + [80, 2.5, 5000] + [100]*10, dtype=np.float64)
+
+# 真实值生成范围（与FEATURE_NAMES逐项对齐）
+REAL_LO = np.array([0.5]*5 + [0.1]*4 + [10]*4 + [5000] + [100]*4 + [5]*3 + [20]*10, dtype=np.float64)
+REAL_HI = np.array([3.0]*5 + [0.8]*4 + [50]*4 + [25000] + [1500]*4 + [30]*3 + [80]*10, dtype=np.float64)
+
+# 共享随机数生成器
+_rng = np.random.default_rng()
+
+def _sanitize_for_json(vals):
+    """将特征值序列转换为可JSON序列化的列表（None/非数值/nan/inf统一转换为None）"""
+    if vals is None:
+        return None
+    if isinstance(vals, np.ndarray) and vals.dtype.kind == 'f':
+        # 数值数组直接向量化处理，无需逐个判断类型
+        arr = vals.astype(np.float64, copy=False)
+    else:
+        arr = np.array([v if isinstance(v, (int, float)) else np.nan for v in vals], dtype=np.float64)
+    return np.where(np.isfinite(arr), arr, None).tolist()
+
+def _frozen(values):
+    """转换为只读float64数组（已是float64数组时不复制），供多处引用共享"""
+    arr = np.asarray(values, dtype=np.float64)
+    arr.flags.writeable = False
+    return arr
 
 class DataGenerator:
     """数据生成器 - 负责获取和生成TBM数据"""
@@ -71,8 +153,17 @@ class DataGenerator:
         self.data_mode = 4  # 默认使用预测值填充模式
         self.last_values = None  # 用于重复数据检测
         
+        # 缺失数据填充模式 -> 填充值生成函数
+        self._fill_fns = {
+            1: self._zero_fill,
+            2: self._random_fill,
+            3: self._prediction_fill,
+            4: self._prediction_fill
+        }
+        
         # 滑动窗口缓冲区 (5步历史数据)
-        self.buffer = np.zeros((5, 31))  # 5个时间步，31个特征
+        self.buffer = np.zeros((5, 31))  # 5个时间步，31个特征（环形缓冲区）
+        self._head = 0  # 环形缓冲区写入位置，同时也是最早数据所在的行
         self.step_count = 0
         self.last_api_data = None  # 用于检测API数据是否变化
         self.buffer_initialized = False  # 缓冲区是否已初始化
@@ -87,6 +178,9 @@ class DataGenerator:
         # 盾构机状态
         self.tbm_status = 'rest'  # 'active' 或 'rest'
         
+        # 后台预取的历史数据（Future），缓冲区初始化时取用
+        self._history_future = None
+        
         # 初始化API客户端和模型
         self._initialize_components()
     
@@ -98,6 +192,11 @@ class DataGenerator:
             try:
                 self.api_client = TBMAPIClient()
                 print("✅ API客户端初始化成功")
+                
+                # 在后台预取缓冲区初始化所需的历史数据，与下面的模型加载并行进行
+                prefetch_pool = ThreadPoolExecutor(max_workers=1)
+                self._history_future = prefetch_pool.submit(self.api_client.get_historical_data, 5)
+                prefetch_pool.shutdown(wait=False)
             except Exception as e:
                 print(f"❌ API客户端初始化失败: {e}")
                 self.api_client = None
@@ -106,6 +205,7 @@ class DataGenerator:
                 self.model_predictor = ModelPredictor()
                 if self.model_predictor.load_model():
                     print("✅ 预测模型加载成功")
+                    self._warmup_predictor()
                 else:
                     print("❌ 预测模型加载失败")
                     self.model_predictor = None
@@ -115,6 +215,14 @@ class DataGenerator:
         else:
             print("⚠️  API和模型模块不可用，将使用模拟数据")
     
+    def _warmup_predictor(self):
+        """用全零输入执行一次预测，提前完成推理会话的首次运行开销，避免占用首个拉取周期"""
+        try:
+            self.model_predictor.predict(np.zeros((5, 31), dtype=np.float64))
+            print("✅ 预测模型预热完成")
+        except Exception as e:
+            print(f"⚠️  预测模型预热失败: {e}")
+    
     def initialize_buffer(self):
         """
         初始化缓冲区 - 拉取5分钟历史数据填充缓冲区
@@ -130,8 +238,12 @@ class DataGenerator:
         print("=" * 60)
         
         if self.api_client and self.model_predictor:
-            # 获取5分钟历史数据
-            historical_data = self.api_client.get_historical_data(minutes_back=5)
+            # 获取5分钟历史数据（优先使用初始化时预取的结果）
+            if self._history_future is not None:
+                historical_data = self._history_future.result()
+                self._history_future = None
+            else:
+                historical_data = self.api_client.get_historical_data(minutes_back=5)
             
             if not historical_data:
                 print("❌ 无法获取历史数据，使用模拟数据初始化")
@@ -190,27 +302,7 @@ class DataGenerator:
     
     def _generate_simulated_data(self):
         """生成模拟数据"""
-        data = []
-        for i in range(31):
-            if i < 5:  # 贯入度和推进压力 (MPa)
-                data.append(random.uniform(0.5, 3.0))
-            elif i < 9:  # 土舱土压 (MPa)
-                data.append(random.uniform(0.1, 0.8))
-            elif i < 13:  # 推进千斤顶速度 (mm/min)
-                data.append(random.uniform(10, 50))
-            elif i == 13:  # 推进油缸总推力 (kN)
-                data.append(random.uniform(5000, 15000))
-            elif i < 18:  # 推进千斤顶行程 (mm)
-                data.append(random.uniform(100, 2000))
-            elif i == 18:  # 推进平均速度 (mm/min)
-                data.append(random.uniform(20, 80))
-            elif i == 19:  # 刀盘转速 (r/min)
-                data.append(random.uniform(0.5, 2.5))
-            elif i == 20:  # 刀盘扭矩 (kN·m)
-                data.append(random.uniform(1000, 5000))
-            else:  # 刀盘电机扭矩 (%)
-                data.append(random.uniform(20, 100))
-        return np.array(data)
+        return _rng.uniform(SIM_LO, SIM_HI)
     
     def get_latest_data(self):
         """获取最新的TBM数据 - 实现与main.py相同的预测逻辑，每分钟第10秒更新"""
@@ -239,10 +331,10 @@ class DataGenerator:
                 
                 # 返回当前缓冲区的最新数据
                 if self.step_count > 0:
-                    current_data = self.buffer[-1]  # 最新的数据（滑动窗口的最后一个位置）
+                    current_data = self.buffer[(self._head - 1) % 5].copy()  # 最新的数据（环形缓冲区上一次写入的位置，复制一份避免被后续写入覆盖）
                     data_sources = ['cached'] * 31  # 标记为缓存数据
                 else:
-                    current_data = np.full(31, None)
+                    current_data = np.full(31, np.nan)
                     data_sources = ['simulated'] * 31
                 
                 # 判定盾构机状态
@@ -265,9 +357,9 @@ class DataGenerator:
                         print(f"🧠 使用智能填充数据 (休息中)")
                 
                 return {
-                    'current_values': current_data.tolist() if isinstance(current_data, np.ndarray) else current_data,
+                    'current_values': current_data,
                     'current_sources': data_sources,
-                    'prediction_values': prediction.tolist() if isinstance(prediction, np.ndarray) else prediction,
+                    'prediction_values': prediction,
                     'step_count': self.step_count,
                     'buffer_ready': self.step_count >= 5,
                     'tbm_status': tbm_status
@@ -284,14 +376,14 @@ class DataGenerator:
             # 确保current_data是31个元素的数组
             if not isinstance(current_data, (list, np.ndarray)) or len(current_data) != 31:
                 print(f"⚠️  当前数据格式错误，使用默认值: {type(current_data)}, 长度: {len(current_data) if hasattr(current_data, '__len__') else 'N/A'}")
-                current_data = np.full(31, None)
+                current_data = np.full(31, np.nan)
                 data_sources = ['simulated'] * 31
             
-            # 2. 更新滑动窗口缓冲区（挤掉最早的数据）
-            self._update_buffer(current_data)
+            # 2. 更新滑动窗口缓冲区（挤掉最早的数据），同时取出清洗后的刀盘扭矩
+            torque_value = self._update_buffer(current_data)
             
             # 3. 判定盾构机状态
-            tbm_status = self._determine_tbm_status(current_data)
+            tbm_status = self._status_from_torque(torque_value)
             
             # 4. 根据盾构机状态决定预测值
             prediction = None
@@ -311,9 +403,9 @@ class DataGenerator:
             
             # 5. 返回当前值和预测值
             return {
-                'current_values': current_data.tolist() if isinstance(current_data, np.ndarray) else current_data,
+                'current_values': current_data,
                 'current_sources': data_sources,
-                'prediction_values': prediction.tolist() if isinstance(prediction, np.ndarray) else prediction,
+                'prediction_values': prediction,
                 'step_count': self.step_count,
                 'buffer_ready': self.step_count >= 5,
                 'tbm_status': tbm_status
@@ -359,30 +451,31 @@ class DataGenerator:
             return self._fill_with_predictions()
     
     def _fill_missing_data(self, api_data, fill_mode=3):
-        """填充缺失数据 - 与main.py逻辑一致"""
-        filled_data = api_data.copy() if hasattr(api_data, 'copy') else api_data[:]
-        
-        for i in range(31):
-            if api_data[i] is None:  # 数据缺失
-                if fill_mode == 1:  # 0填充
-                    filled_data[i] = 0.0
-                elif fill_mode == 2:  # 随机填充
-                    filled_data[i] = self._generate_realistic_value(i)
-                elif fill_mode == 3:  # 预测值填充
-                    if self.last_prediction is not None:
-                        filled_data[i] = self.last_prediction[i]
-                    else:
-                        filled_data[i] = self._generate_realistic_value(i)
-                elif fill_mode == 4:  # 预测值填充
-                    if self.last_prediction is not None:
-                        filled_data[i] = self.last_prediction[i]
-                    else:
-                        filled_data[i] = self._generate_realistic_value(i)
-                else:
-                    filled_data[i] = self._generate_realistic_value(i)
+        """填充缺失数据 - 与main.py逻辑一致（缺失位置由掩码一次性替换）"""
+        filled_data = np.array(api_data, dtype=np.float64)
+        missing = np.isnan(filled_data)
+        
+        if missing.any():
+            # 按填充模式查表选择填充来源，未知模式使用随机填充
+            fill_fn = self._fill_fns.get(fill_mode, self._random_fill)
+            np.copyto(filled_data, fill_fn(), where=missing)
         
         return filled_data
     
+    def _zero_fill(self):
+        """模式1: 0填充"""
+        return np.zeros(31)
+    
+    def _random_fill(self):
+        """模式2: 随机填充"""
+        return _rng.uniform(REAL_LO, REAL_HI)
+    
+    def _prediction_fill(self):
+        """模式3/4: 预测值填充（尚无预测结果时使用随机填充）"""
+        if self.last_prediction is not None:
+            return np.asarray(self.last_prediction, dtype=np.float64)
+        return self._random_fill()
+    
     def _fill_with_predictions(self):
         """完全使用预测值填充"""
         if self.last_prediction is not None:
@@ -413,17 +506,17 @@ class DataGenerator:
             if self.last_api_data is not None:
                 if self._is_data_same(api_data, self.last_api_data):
                     print("⚠️  检测到API数据与上一次相同，认为没有获取到新数据")
-                    # 返回全None数组，让fill_missing_data处理
-                    api_data = np.full(31, None)
+                    # 返回全NaN数组，让fill_missing_data处理
+                    api_data = np.full(31, np.nan)
             
-            # 保存当前数据作为下次比较的基准
-            self.last_api_data = api_data.copy() if api_data is not None else None
+            # 保存当前数据作为下次比较的基准（一次性转为float数组，缺失值为NaN；只读，无需复制）
+            self.last_api_data = _frozen(api_data) if api_data is not None else None
             
             return api_data
             
         except Exception as e:
             print(f"❌ API数据获取失败: {e}")
-            return np.full(31, None)
+            return np.full(31, np.nan)
     
     def _generate_mock_data(self):
         """生成模拟数据 - API不可用时100%生成模拟数据"""
@@ -431,43 +524,29 @@ class DataGenerator:
         # 所有31个特征都有值，模拟真实API数据
         # 每次生成略有不同的数据，避免重复检测问题
         
-        data = []
-        for i in range(31):
-            # 添加时间戳影响，确保每次生成略有不同
-            base_value = self._generate_realistic_value(i)
-            # 添加小幅随机变化（±2%）
-            variation = base_value * 0.02 * (random.random() - 0.5) * 2
-            value = base_value + variation
-            data.append(value)
+        base = _rng.uniform(REAL_LO, REAL_HI)
+        # 添加小幅随机变化（±2%），31个特征一次生成
+        data = base + base * 0.02 * (_rng.random(31) - 0.5) * 2
         
         print("📡 模拟API返回完整数据（API不可用模式）")
         return data
     
     def _generate_realistic_value(self, feature_index):
         """生成符合特征类型的真实值"""
-        if feature_index < 5:  # 贯入度和推进压力 (MPa)
-            return random.uniform(0.5, 3.0)
-        elif feature_index < 9:  # 土舱土压 (MPa)
-            return random.uniform(0.1, 0.8)
-        elif feature_index < 13:  # 推进千斤顶速度 (mm/min)
-            return random.uniform(10, 50)
-        elif feature_index == 13:  # 推进油缸总推力 (kN)
-            return random.uniform(5000, 25000)
-        elif feature_index < 18:  # 推进千斤顶行程 (mm)
-            return random.uniform(100, 1500)
-        elif feature_index < 21:  # 推进平均速度, 刀盘转速, 刀盘扭矩
-            return random.uniform(5, 30)
-        else:  # 刀盘电机扭矩 (%)
-            return random.uniform(20, 80)
+        return float(_rng.uniform(REAL_LO[feature_index], REAL_HI[feature_index]))
     
     def _process_data_with_smart_filling(self, raw_data):
         """处理数据 - 智能填充逻辑（API不可用时100%使用模拟数据）"""
         processed_data = []
         
+        # 所有缺失特征(NaN)的填充值一次性向量化生成
+        missing = np.flatnonzero(np.isnan(np.asarray(raw_data, dtype=np.float64)))
+        filled_values = dict(zip(missing.tolist(), self._generate_filled_values(missing)))
+        
         for i, current_value in enumerate(raw_data):
-            if current_value is None:
+            if i in filled_values:
                 # 缺失数据，使用模拟数据填充
-                filled_value = self._generate_filled_value(i, None)
+                filled_value = filled_values[i]
                 processed_data.append({
                     'value': filled_value,
                     'predicted': True,
@@ -485,36 +564,20 @@ class DataGenerator:
         
         return processed_data
     
-    
-    
-    def _generate_filled_value(self, feature_id, original_value):
-        """生成填充值"""
-        # 基于原始值或生成合理的默认值
-        if original_value is not None:
-            base_value = original_value
-        else:
-            base_value = self._generate_realistic_value(feature_id)
-        
-        # 添加小幅随机变化，模拟真实填充
-        variation = base_value * 0.05 * (random.random() - 0.5) * 2  # ±5%变化
-        filled_value = base_value + variation
-        
-        # 确保在合理范围内
-        min_value = max(0, base_value * 0.7)
-        max_value = base_value * 1.3
-        
-        return max(min_value, min(max_value, filled_value))
+    def _generate_filled_values(self, feature_ids):
+        """批量生成缺失特征的填充值"""
+        idx = np.asarray(feature_ids, dtype=np.intp)
+        base = _rng.uniform(REAL_LO[idx], REAL_HI[idx])
+        # 添加小幅随机变化（±5%），并限制在合理范围内
+        filled = base + base * 0.05 * (_rng.random(idx.size) - 0.5) * 2
+        np.clip(filled, np.maximum(0, base * 0.7), base * 1.3, out=filled)
+        return filled.tolist()
     
     def _get_current_api_data(self):
         """获取当前时刻的API数据 - 与main.py逻辑一致，每分钟第10秒拉取"""
         current_time = datetime.now()
-        current_second = current_time.second
-        
-        # 检查是否到了每分钟的第10秒
-        if current_second != self.DATA_FETCH_SECOND:
-            # 不是拉取时间，返回None表示不更新数据
-            return None
         
+        # 拉取时刻由数据收集线程调度（对齐到每分钟第10秒），这里只需避免同一分钟内重复拉取
         # 检查是否已经在这一分钟拉取过数据（避免重复拉取）
         if (self.last_fetch_time is not None and 
             current_time.minute == self.last_fetch_time.minute and
@@ -544,6 +607,14 @@ class DataGenerator:
             print("📡 生成模拟数据（API不可用模式）")
             return self._generate_mock_data()
     
+    def seconds_until_next_fetch(self):
+        """计算距离下一个拉取时刻（每分钟第DATA_FETCH_SECOND秒）的秒数"""
+        now = datetime.now()
+        target = now.replace(second=self.DATA_FETCH_SECOND, microsecond=0)
+        if target <= now:
+            target += timedelta(minutes=1)
+        return (target - now).total_seconds()
+    
     def _is_data_same(self, data1, data2):
         """比较两次API数据是否相同 - 与main.py逻辑一致"""
         if data1 is None and data2 is None:
@@ -551,24 +622,14 @@ class DataGenerator:
         if data1 is None or data2 is None:
             return False
         
-        # 比较有效数据（非None值）
-        for i in range(31):
-            val1 = data1[i]
-            val2 = data2[i]
-            
-            # 如果两个值都是None，认为相同
-            if val1 is None and val2 is None:
-                continue
-            
-            # 如果一个是None另一个不是，认为不同
-            if val1 is None or val2 is None:
-                return False
-            
-            # 比较数值（考虑浮点数精度）
-            if abs(val1 - val2) > 1e-6:
-                return False
-        
-        return True
+        # 缺失值为NaN，整体比较：同为缺失或差值不超过1e-6视为相同
+        a = np.asarray(data1, dtype=np.float64)
+        b = np.asarray(data2, dtype=np.float64)
+        if a.shape != b.shape:
+            return False
+        both_nan = np.isnan(a) & np.isnan(b)
+        close = np.isclose(a, b, rtol=0.0, atol=1e-6, equal_nan=False)
+        return bool(np.all(both_nan | close))
     
     def _detect_data_changes(self, current_data):
         """
@@ -580,37 +641,33 @@ class DataGenerator:
         Returns:
             bool: 是否有数据变化
         """
+        current = _frozen(current_data)
+        
         if self.last_fetched_data is None:
             # 第一次拉取，没有比较基准
-            self.last_fetched_data = current_data.copy() if hasattr(current_data, 'copy') else current_data[:]
+            self.last_fetched_data = current
             return False
         
-        # 比较数据变化
-        changes = []
-        for i in range(min(len(current_data), len(self.last_fetched_data))):
-            if current_data[i] is not None and self.last_fetched_data[i] is not None:
-                if abs(current_data[i] - self.last_fetched_data[i]) > 1e-6:
-                    changes.append({
-                        'index': i + 1,
-                        'name': FEATURE_NAMES[i] if i < len(FEATURE_NAMES) else f'特征{i+1}',
-                        'old_value': self.last_fetched_data[i],
-                        'new_value': current_data[i],
-                        'change': current_data[i] - self.last_fetched_data[i],
-                        'change_percent': ((current_data[i] - self.last_fetched_data[i]) / abs(self.last_fetched_data[i])) * 100 if self.last_fetched_data[i] != 0 else 0
-                    })
-        
-        if changes:
-            print(f"🔄 检测到数据变化！共 {len(changes)} 个特征发生变化:")
-            for change in changes[:5]:  # 只显示前5个变化
-                direction = "↗️" if change['change'] > 0 else "↘️"
-                print(f"   {direction} {change['name']}: {change['old_value']:.6f} → {change['new_value']:.6f} "
-                      f"({change['change']:+.6f}, {change['change_percent']:+.1f}%)")
-            
-            if len(changes) > 5:
-                print(f"   ... 还有 {len(changes) - 5} 个特征发生变化")
+        # 比较数据变化（数值计算在fast_kernels中完成，缺失值为NaN不计入变化）
+        indices, deltas, percents = diff_mask(current, self.last_fetched_data, 1e-6)
+        
+        if indices.size:
+            print(f"🔄 检测到数据变化！共 {indices.size} 个特征发生变化:")
+            # 只显示变化幅度最大的5个
+            magnitude = np.abs(deltas)
+            top = np.argpartition(-magnitude, 4)[:5] if indices.size > 5 else np.arange(indices.size)
+            top = top[np.argsort(-magnitude[top])]
+            for k in top:
+                i = indices[k]
+                direction = "↗️" if deltas[k] > 0 else "↘️"
+                print(f"   {direction} {FEATURE_NAMES[i]}: {self.last_fetched_data[i]:.6f} → {current[i]:.6f} "
+                      f"({deltas[k]:+.6f}, {percents[k]:+.1f}%)")
+            
+            if indices.size > 5:
+                print(f"   ... 还有 {indices.size - 5} 个特征发生变化")
             
             # 更新存储的数据
-            self.last_fetched_data = current_data.copy() if hasattr(current_data, 'copy') else current_data[:]
+            self.last_fetched_data = current
             return True
         else:
             print("📊 数据无变化")
@@ -631,7 +688,20 @@ class DataGenerator:
             return 'rest'
         
         # 刀盘扭矩是第21个特征（索引20）
-        torque_value = current_data[20]
+        return self._status_from_torque(current_data[20])
+    
+    def _status_from_torque(self, torque_value):
+        """
+        根据刀盘扭矩值更新并返回盾构机状态
+        
+        Args:
+            torque_value: 刀盘扭矩（缺失时为None或NaN）
+            
+        Returns:
+            str: 'active' (掘进中) 或 'rest' (休息)
+        """
+        if torque_value is not None and torque_value != torque_value:
+            torque_value = None  # NaN视为缺失
         
         # 修改判断逻辑：刀盘扭矩大于0则为掘进中，否则为休息
         if torque_value is not None and torque_value > 0:
@@ -655,48 +725,51 @@ class DataGenerator:
         Returns:
             np.ndarray: 智能填充的31个特征值
         """
-        filled_data = []
-        
-        for i in range(31):
-            if current_data[i] is not None:
-                # 有真实数据，使用真实数据
-                filled_data.append(current_data[i])
-            else:
-                # 无真实数据，使用智能填充
-                filled_data.append(self._generate_realistic_value(i))
-        
-        return np.array(filled_data)
+        # 有真实数据使用真实数据，缺失值(NaN)使用智能填充
+        current = np.asarray(current_data, dtype=np.float64)
+        missing = np.isnan(current)
+        if not missing.any():
+            return current.copy()
+        return np.where(missing, _rng.uniform(REAL_LO, REAL_HI), current)
     
     def _update_buffer(self, new_data):
-        """更新滑动窗口缓冲区 - 与main.py逻辑一致"""
-        # 左移数据
-        self.buffer[:-1] = self.buffer[1:]
+        """
+        更新滑动窗口缓冲区 - 与main.py逻辑一致（环形缓冲区，覆盖最早的数据）
         
-        # 添加新数据 - 处理None值
+        Args:
+            new_data: 新一步的31个特征值
+            
+        Returns:
+            float: 清洗后的刀盘扭矩（缺失/非有限值为NaN），供状态判定使用
+        """
+        torque_value = np.nan
+        
+        # 添加新数据 - None/非数值/nan/inf统一替换为0，避免nan问题
         if new_data is not None and len(new_data) == 31:
-            # 将None值替换为0，避免nan问题
-            processed_data = []
-            for val in new_data:
-                if val is None:
-                    processed_data.append(0.0)
-                elif isinstance(val, (int, float)):
-                    # 检查是否为nan或inf
-                    if np.isnan(val) if hasattr(np, 'isnan') else (val != val):
-                        processed_data.append(0.0)
-                    elif np.isinf(val) if hasattr(np, 'isinf') else (val == float('inf') or val == float('-inf')):
-                        processed_data.append(0.0)
-                    else:
-                        processed_data.append(float(val))
-                else:
-                    processed_data.append(0.0)
-            self.buffer[-1] = processed_data
+            row = self.buffer[self._head]
+            if isinstance(new_data, np.ndarray) and new_data.dtype.kind == 'f':
+                row[:] = new_data
+            else:
+                row[:] = [v if isinstance(v, (int, float)) else np.nan for v in new_data]
+            # 在同一次清洗中取出刀盘扭矩（第21个特征），无需再次遍历原始数据
+            if np.isfinite(row[20]):
+                torque_value = float(row[20])
+            np.nan_to_num(row, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
         else:
             # 如果新数据为None或长度不正确，用0填充
-            self.buffer[-1] = [0.0] * 31
+            self.buffer[self._head] = 0.0
             if new_data is not None and len(new_data) != 31:
                 print(f"⚠️  新数据长度不正确: {len(new_data)}/31，使用0填充")
         
+        self._head = (self._head + 1) % 5
         self.step_count += 1
+        return torque_value
+    
+    def _buffer_view(self):
+        """按时间顺序（从最早到最新）返回滑动窗口数据"""
+        if self._head == 0:
+            return self.buffer
+        return np.concatenate((self.buffer[self._head:], self.buffer[:self._head]))
     
     def _predict_next_step(self):
         """预测下一时刻 - 与main.py逻辑一致"""
@@ -705,8 +778,9 @@ class DataGenerator:
         
         try:
             # 使用滑动窗口数据进行预测
-            prediction = self.model_predictor.predict(self.buffer)
-            self.last_prediction = prediction.copy()  # 保存预测结果
+            prediction = self.model_predictor.predict(self._buffer_view())
+            prediction.flags.writeable = False  # 预测结果只读共享，无需复制
+            self.last_prediction = prediction  # 保存预测结果
             return prediction
         except Exception as e:
             print(f"❌ 预测执行失败: {e}")
@@ -721,55 +795,46 @@ def data_collection_thread():
     
     while is_running:
         try:
-            # 获取最新数据
+            # 获取最新数据（本线程是唯一调用get_latest_data的地方）
             data_result = data_generator.get_latest_data()
             
             # 提取current_values
-            if isinstance(data_result, dict) and 'current_values' in data_result:
-                current_data = data_result['current_values']
-            else:
+            if not isinstance(data_result, dict) or 'current_values' not in data_result:
                 print(f"⚠️  数据格式错误: {type(data_result)}")
-                current_data = [None] * 31
+                data_result = {}
+            current_data = data_result.get('current_values', [None] * 31)
             
             # 检测数据变化
-            if current_data and len(current_data) == 31:
+            if current_data is not None and len(current_data) == 31:
                 data_generator._detect_data_changes(current_data)
             
-            # 更新全局数据
-            last_data = {
+            # 构建新的数据快照，整体替换全局引用（不修改已发布的快照）
+            snapshot = {
                 'timestamp': datetime.now().isoformat(),
-                'features': current_data,
-                'step_count': data_result.get('step_count', 0) if isinstance(data_result, dict) else 0,
-                'buffer_ready': data_result.get('buffer_ready', False) if isinstance(data_result, dict) else False
+                'current_values': current_data,
+                'current_sources': data_result.get('current_sources', ['simulated'] * 31),
+                'prediction_values': data_result.get('prediction_values'),
+                'step_count': data_result.get('step_count', 0),
+                'buffer_ready': data_result.get('buffer_ready', False),
+                'tbm_status': data_result.get('tbm_status', 'rest')
             }
             
             # 更新last_values用于重复检测
-            if current_data and len(current_data) == 31:
-                data_generator.last_values = []
-                for item in current_data:
-                    if isinstance(item, (int, float)) and not (np.isnan(item) if hasattr(np, 'isnan') else False):
-                        data_generator.last_values.append(item)
-                    else:
-                        data_generator.last_values.append(None)
+            if current_data is not None and len(current_data) == 31:
+                data_generator.last_values = _sanitize_for_json(current_data)
             
-            # 将数据放入缓冲区
-            if not data_buffer.full():
-                data_buffer.put(last_data)
-            else:
-                # 缓冲区满时，移除最旧的数据
-                try:
-                    data_buffer.get_nowait()
-                    data_buffer.put(last_data)
-                except queue.Empty:
-                    pass
+            # 发布快照并放入历史缓冲区
+            with data_lock:
+                last_data = snapshot
+                data_buffer.append(snapshot)
             
             print(f"✅ 数据收集完成: {datetime.now().strftime('%H:%M:%S')}")
             
         except Exception as e:
             print(f"❌ 数据收集错误: {e}")
         
-        # 等待10秒（减少数据收集频率）
-        time.sleep(10)
+        # 休眠到下一个拉取时刻（每分钟第10秒），停止时立即唤醒
+        stop_event.wait(data_generator.seconds_until_next_fetch())
 
 # API路由
 @app.route('/')
@@ -779,110 +844,70 @@ def index():
 
 @app.route('/api/tbm-data')
 def get_tbm_data():
-    """获取TBM数据API - 返回当前值和预测值"""
-    global last_data
-    
+    """获取TBM数据API - 返回当前值和预测值（只读取数据收集线程发布的快照）"""
     try:
-        print(f"📡 API请求: /api/tbm-data at {datetime.now().strftime('%H:%M:%S')}")
-        
-        # 获取最新数据（包含当前值和预测值）
-        data_result = data_generator.get_latest_data()
+        logger.debug("📡 API请求: /api/tbm-data")
         
-        # 验证数据结果
-        if not isinstance(data_result, dict):
-            raise ValueError("数据生成器返回格式错误")
+        # 读取最新快照（数据收集线程负责所有数据获取和预测）
+        with data_lock:
+            snapshot = last_data
+        if snapshot is None:
+            snapshot = {}
         
         # 构建返回数据
-        current_values = data_result.get('current_values', [])
-        current_sources = data_result.get('current_sources', [])
-        prediction_values = data_result.get('prediction_values')
-        step_count = data_result.get('step_count', 0)
-        buffer_ready = data_result.get('buffer_ready', False)
+        current_values = snapshot.get('current_values', [])
+        current_sources = snapshot.get('current_sources', [])
+        prediction_values = snapshot.get('prediction_values')
+        step_count = snapshot.get('step_count', 0)
+        buffer_ready = snapshot.get('buffer_ready', False)
         
         # 确保current_values是31个元素的数组
         if not isinstance(current_values, (list, np.ndarray)) or len(current_values) != 31:
-            print(f"⚠️  当前值数量不正确: {len(current_values) if hasattr(current_values, '__len__') else 'N/A'}/31，使用默认值填充")
+            logger.warning("⚠️  当前值数量不正确: %s/31，使用默认值填充",
+                           len(current_values) if hasattr(current_values, '__len__') else 'N/A')
             current_values = [None] * 31
             current_sources = ['simulated'] * 31
         
-        # 清理数据，处理infinity和nan值
-        cleaned_values = []
-        for i, val in enumerate(current_values):
-            if val is None:
-                cleaned_values.append(None)
-            elif isinstance(val, (int, float)):
-                if np.isnan(val) if hasattr(np, 'isnan') else (val != val):
-                    cleaned_values.append(None)
-                elif np.isinf(val) if hasattr(np, 'isinf') else (val == float('inf') or val == float('-inf')):
-                    cleaned_values.append(None)
-                else:
-                    cleaned_values.append(val)
-            else:
-                cleaned_values.append(None)
-        
-        current_values = cleaned_values
-        
-        # 构建特征数据数组
-        features = []
-        for i in range(31):
-            try:
-                # 当前值 - 安全转换为Python原生类型
-                current_val = current_values[i] if i < len(current_values) and current_values[i] is not None else None
-                if current_val is not None:
-                    current_val = float(current_val)  # 转换为Python float
-                
-                # 当前值数据来源
-                current_source = current_sources[i] if i < len(current_sources) else 'simulated'
-                
-                # 预测值（如果缓冲区已满且有预测结果）
-                pred_val = None
-                if prediction_values is not None and i < len(prediction_values) and prediction_values[i] is not None:
-                    pred_val = float(prediction_values[i])  # 转换为Python float
-                
-                features.append({
-                    'id': i + 1,
-                    'current_value': current_val,
-                    'current_source': current_source,
-                    'prediction_value': pred_val,
-                    'step_count': int(step_count),
-                    'buffer_ready': bool(buffer_ready)
-                })
-            except (ValueError, TypeError, IndexError) as e:
-                print(f"⚠️  处理特征{i+1}时出错: {e}")
-                features.append({
-                    'id': i + 1,
-                    'current_value': None,
-                    'current_source': 'simulated',
-                    'prediction_value': None,
-                    'step_count': int(step_count),
-                    'buffer_ready': bool(buffer_ready)
-                })
-        
-        last_data = {
-            'timestamp': datetime.now().isoformat(),
-            'features': features,
-            'step_count': int(step_count),
-            'buffer_ready': bool(buffer_ready)
+        # 清理数据，处理infinity和nan值（整体向量化转换为float/None列表）
+        current_values = _sanitize_for_json(current_values)
+        if prediction_values is not None and len(prediction_values) == 31:
+            prediction_values = _sanitize_for_json(prediction_values)
+        else:
+            prediction_values = [None] * 31
+        current_sources = list(current_sources[:31]) + ['simulated'] * (31 - len(current_sources))
+        step_count = int(step_count)
+        buffer_ready = bool(buffer_ready)
+        
+        # 按列返回特征数据（每个字段一个长度为31的数组，第i项对应特征i+1）
+        response = {
+            'timestamp': snapshot.get('timestamp', datetime.now().isoformat()),
+            'ids': _FEATURE_IDS,
+            'current_values': current_values,
+            'current_sources': current_sources,
+            'prediction_values': prediction_values,
+            'step_count': step_count,
+            'buffer_ready': buffer_ready,
+            'tbm_status': snapshot.get('tbm_status', 'rest')
         }
         
-        print(f"✅ 返回数据: 步骤{step_count}, 缓冲区{'就绪' if buffer_ready else '未就绪'}")
-        return jsonify(last_data)
+        logger.info("✅ 返回数据: 步骤%d, 缓冲区%s", step_count, '就绪' if buffer_ready else '未就绪')
+        return _json(response)
         
     except Exception as e:
-        print(f"❌ API处理错误: {e}")
+        logger.error("❌ API处理错误: %s", e)
         # 返回错误响应
         error_response = {
             'error': True,
             'message': str(e),
             'timestamp': datetime.now().isoformat(),
-            'features': []
+            'current_values': []
         }
-        return jsonify(error_response), 500
+        return _json(error_response, 500)
 
 @app.route('/api/status')
 def get_status():
     """获取系统状态API"""
-    return jsonify({
+    return _json({
         'status': 'running' if is_running else 'stopped',
         'api_available': API_AVAILABLE,
         'data_mode': data_generator.data_mode,
@@ -891,34 +916,23 @@ def get_status():
 
 @app.route('/api/features')
 def get_features():
-    """获取特征配置API"""
-    features = []
-    for i, (name, unit) in enumerate(zip(FEATURE_NAMES, FEATURE_UNITS)):
-        features.append({
-            'id': i + 1,
-            'name': name,
-            'unit': unit
-        })
-    
-    return jsonify({'features': features})
+    """获取特征配置API（返回导入时预先序列化的响应内容）"""
+    return app.response_class(_FEATURES_JSON, mimetype='application/json')
 
 @app.route('/api/history')
 def get_history():
     """获取历史数据API"""
-    history = []
-    
-    # 从缓冲区获取历史数据
-    temp_queue = queue.Queue()
-    while not data_buffer.empty():
-        data = data_buffer.get()
-        history.append(data)
-        temp_queue.put(data)
-    
-    # 将数据放回缓冲区
-    while not temp_queue.empty():
-        data_buffer.put(temp_queue.get())
-    
-    return jsonify({'history': history})
+    with data_lock:
+        history = list(data_buffer)
+    
+    # 快照中的特征值保持为numpy数组，仅在序列化前转换为JSON列表
+    history = [
+        dict(item,
+             current_values=_sanitize_for_json(item.get('current_values')),
+             prediction_values=_sanitize_for_json(item.get('prediction_values')))
+        for item in history
+    ]
+    return _json({'history': history})
 
 @app.route('/api/control', methods=['POST'])
 def control_system():
@@ -929,24 +943,22 @@ def control_system():
     action = data.get('action')
     
     if action == 'start':
-        if not is_running:
-            is_running = True
-            thread = threading.Thread(target=data_collection_thread, daemon=True)
-            thread.start()
-            return jsonify({'status': 'started'})
+        if start_data_collection():
+            return _json({'status': 'started'})
         else:
-            return jsonify({'status': 'already_running'})
+            return _json({'status': 'already_running'})
     
     elif action == 'stop':
         is_running = False
-        return jsonify({'status': 'stopped'})
+        stop_event.set()
+        return _json({'status': 'stopped'})
     
     elif action == 'set_mode':
         mode = data.get('mode', 4)
         data_generator.data_mode = mode
-        return jsonify({'status': 'mode_updated', 'mode': mode})
+        return _json({'status': 'mode_updated', 'mode': mode})
     
-    return jsonify({'error': 'Invalid action'}), 400
+    return _json({'error': 'Invalid action'}, 400)
 
 # 静态文件服务
 @app.route('/<path:filename>')
@@ -954,6 +966,24 @@ def static_files(filename):
     """提供静态文件"""
     return send_from_directory('.', filename)
 
+def start_data_collection():
+    """
+    启动数据收集线程（开发服务器、ASGI服务器和gunicorn worker共用的启动入口）
+    
+    Returns:
+        bool: 本次是否启动了新线程（已在运行时返回False）
+    """
+    global is_running
+    
+    if is_running:
+        return False
+    
+    is_running = True
+    stop_event.clear()
+    thread = threading.Thread(target=data_collection_thread, daemon=True)
+    thread.start()
+    return True
+
 def main():
     """主函数"""
     global is_running
@@ -962,9 +992,7 @@ def main():
     print("=" * 50)
     
     # 启动数据收集线程
-    is_running = True
-    thread = threading.Thread(target=data_collection_thread, daemon=True)
-    thread.start()
+    start_data_collection()
     
     print("✅ 数据收集线程已启动")
     print("✅ Web服务器启动中...")
@@ -974,12 +1002,20 @@ def main():
     print("=" * 50)
     
     try:
-        # 启动Flask应用
-        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        if ASGI_AVAILABLE:
+            # 使用ASGI服务器：事件循环处理并发连接，接口只读取内存中的数据快照
+            # 直接传入应用对象（而非"app:asgi_app"字符串），保证与数据收集线程共享同一份全局状态
+            uvicorn.run(asgi_app, host='0.0.0.0', port=5000, workers=1, loop='auto')
+        else:
+            # 未安装uvicorn/asgiref时退回Flask开发服务器
+            app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
     except KeyboardInterrupt:
-        print("\n🛑 正在停止系统...")
-        is_running = False
-        print("✅ 系统已停止")
+        pass
+    
+    print("\n🛑 正在停止系统...")
+    is_running = False
+    stop_event.set()
+    print("✅ 系统已停止")
 
 if __name__ == '__main__':
     main()
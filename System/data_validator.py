@@ -20,88 +20,113 @@ import numpy as np
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from fast_kernels import range_masks
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# =============================================================================
+# 特征配置
+# =============================================================================
+# 特征名称定义
+FEATURE_NAMES = (
+    '贯入度', '推进区间的压力（上）', '推进区间的压力（右）', '推进区间的压力（下）', '推进区间的压力（左）',
+    '土舱土压（右）', '土舱土压（右下）', '土舱土压（左）', '土舱土压（左下）',
+    'No.16推进千斤顶速度', 'No.4推进千斤顶速度', 'No.8推进千斤顶速度', 'No.12推进千斤顶速度',
+    '推进油缸总推力', 'No.16推进千斤顶行程', 'No.4推进千斤顶行程', 'No.8推进千斤顶行程', 'No.12推进千斤顶行程',
+    '推进平均速度', '刀盘转速', '刀盘扭矩',
+    'No.1刀盘电机扭矩', 'No.2刀盘电机扭矩', 'No.3刀盘电机扭矩', 'No.4刀盘电机扭矩', 'No.5刀盘电机扭矩',
+    'No.6刀盘电机扭矩', 'No.7刀盘电机扭矩', 'No.8刀盘电机扭矩', 'No.9刀盘电机扭矩', 'No.10刀盘电机扭矩'
+)
+
+# 特征单位定义
+FEATURE_UNITS = (
+    'MPa', 'MPa', 'MPa', 'MPa', 'MPa',  # 贯入度, 推进压力
+    'MPa', 'MPa', 'MPa', 'MPa',  # 土舱土压
+    'mm/min', 'mm/min', 'mm/min', 'mm/min',  # 推进千斤顶速度
+    'kN',  # 推进油缸总推力
+    'mm', 'mm', 'mm', 'mm',  # 推进千斤顶行程
+    'mm/min', 'r/min', 'kN·m',  # 推进平均速度, 刀盘转速, 刀盘扭矩
+    '%', '%', '%', '%', '%', '%', '%', '%', '%', '%'  # 刀盘电机扭矩
+)
+
+# 特征合理范围定义（按特征索引排列的(最小值, 最大值)）
+_FEATURE_RANGES = (
+    # 贯入度和推进压力 (MPa)
+    (0.1, 5.0),  # 贯入度
+    (0.1, 5.0),  # 推进区间的压力（上）
+    (0.1, 5.0),  # 推进区间的压力（右）
+    (0.1, 5.0),  # 推进区间的压力（下）
+    (0.1, 5.0),  # 推进区间的压力（左）
+
+    # 土舱土压 (MPa)
+    (0.01, 2.0),  # 土舱土压（右）
+    (0.01, 2.0),  # 土舱土压（右下）
+    (0.01, 2.0),  # 土舱土压（左）
+    (0.01, 2.0),  # 土舱土压（左下）
+
+    # 推进千斤顶速度 (mm/min)
+    (0, 100),  # No.16推进千斤顶速度
+    (0, 100),  # No.4推进千斤顶速度
+    (0, 100),  # No.8推进千斤顶速度
+    (0, 100),  # No.12推进千斤顶速度
+
+    # 推进油缸总推力 (kN)
+    (1000, 20000),  # 推进油缸总推力
+
+    # 推进千斤顶行程 (mm)
+    (0, 3000),  # No.16推进千斤顶行程
+    (0, 3000),  # No.4推进千斤顶行程
+    (0, 3000),  # No.8推进千斤顶行程
+    (0, 3000),  # No.12推进千斤顶行程
+
+    # 推进平均速度 (mm/min)
+    (0, 100),  # 推进平均速度
+
+    # 刀盘转速 (r/min)
+    (0, 5),  # 刀盘转速
+
+    # 刀盘扭矩 (kN·m)
+    (0, 10000),  # 刀盘扭矩
+
+    # 刀盘电机扭矩 (%)
+    (0, 100),  # No.1刀盘电机扭矩
+    (0, 100),  # No.2刀盘电机扭矩
+    (0, 100),  # No.3刀盘电机扭矩
+    (0, 100),  # No.4刀盘电机扭矩
+    (0, 100),  # No.5刀盘电机扭矩
+    (0, 100),  # No.6刀盘电机扭矩
+    (0, 100),  # No.7刀盘电机扭矩
+    (0, 100),  # No.8刀盘电机扭矩
+    (0, 100),  # No.9刀盘电机扭矩
+    (0, 100),  # No.10刀盘电机扭矩
+)
+
+# 范围上下限存为连续数组（结构数组化），按特征索引直接访问，供向量化校验使用
+# 模块级常量，所有DataValidator实例共享（只读）
+_MINS = np.array([lo for lo, _ in _FEATURE_RANGES], dtype=np.float64)
+_MAXS = np.array([hi for _, hi in _FEATURE_RANGES], dtype=np.float64)
+# 扩展范围（允许超出范围20%），用于异常值检测
+_EXT_MINS = _MINS * 0.8
+_EXT_MAXS = _MAXS * 1.2
+# 范围中值，用于缺失值和异常值填充
+_MIDS = (_MINS + _MAXS) / 2
+for _arr in (_MINS, _MAXS, _EXT_MINS, _EXT_MAXS, _MIDS):
+    _arr.flags.writeable = False
+
 class DataValidator:
     """数据验证器"""
     
     def __init__(self):
         """初始化数据验证器"""
-        # 特征名称定义
-        self.feature_names = [
-            '贯入度', '推进区间的压力（上）', '推进区间的压力（右）', '推进区间的压力（下）', '推进区间的压力（左）',
-            '土舱土压（右）', '土舱土压（右下）', '土舱土压（左）', '土舱土压（左下）',
-            'No.16推进千斤顶速度', 'No.4推进千斤顶速度', 'No.8推进千斤顶速度', 'No.12推进千斤顶速度',
-            '推进油缸总推力', 'No.16推进千斤顶行程', 'No.4推进千斤顶行程', 'No.8推进千斤顶行程', 'No.12推进千斤顶行程',
-            '推进平均速度', '刀盘转速', '刀盘扭矩',
-            'No.1刀盘电机扭矩', 'No.2刀盘电机扭矩', 'No.3刀盘电机扭矩', 'No.4刀盘电机扭矩', 'No.5刀盘电机扭矩',
-            'No.6刀盘电机扭矩', 'No.7刀盘电机扭矩', 'No.8刀盘电机扭矩', 'No.9刀盘电机扭矩', 'No.10刀盘电机扭矩'
-        ]
-        
-        # 特征单位定义
-        self.feature_units = [
-            'MPa', 'MPa', 'MPa', 'MPa', 'MPa',  # 贯入度, 推进压力
-            'MPa', 'MPa', 'MPa', 'MPa',  # 土舱土压
-            'mm/min', 'mm/min', 'mm/min', 'mm/min',  # 推进千斤顶速度
-            'kN',  # 推进油缸总推力
-            'mm', 'mm', 'mm', 'mm',  # 推进千斤顶行程
-            'mm/min', 'r/min', 'kN·m',  # 推进平均速度, 刀盘转速, 刀盘扭矩
-            '%', '%', '%', '%', '%', '%', '%', '%', '%', '%'  # 刀盘电机扭矩
-        ]
-        
-        # 特征合理范围定义
-        self.feature_ranges = {
-            # 贯入度和推进压力 (MPa)
-            0: (0.1, 5.0),  # 贯入度
-            1: (0.1, 5.0),  # 推进区间的压力（上）
-            2: (0.1, 5.0),  # 推进区间的压力（右）
-            3: (0.1, 5.0),  # 推进区间的压力（下）
-            4: (0.1, 5.0),  # 推进区间的压力（左）
-            
-            # 土舱土压 (MPa)
-            5: (0.01, 2.0),  # 土舱土压（右）
-            6: (0.01, 2.0),  # 土舱土压（右下）
-            7: (0.01, 2.0),  # 土舱土压（左）
-            8: (0.01, 2.0),  # 土舱土压（左下）
-            
-            # 推进千斤顶速度 (mm/min)
-            9: (0, 100),  # No.16推进千斤顶速度
-            10: (0, 100),  # No.4推进千斤顶速度
-            11: (0, 100),  # No.8推进千斤顶速度
-            12: (0, 100),  # No.12推进千斤顶速度
-            
-            # 推进油缸总推力 (kN)
-            13: (1000, 20000),  # 推进油缸总推力
-            
-            # 推进千斤顶行程 (mm)
-            14: (0, 3000),  # No.16推进千斤顶行程
-            15: (0, 3000),  # No.4推进千斤顶行程
-            16: (0, 3000),  # No.8推进千斤顶行程
-            17: (0, 3000),  # No.12推进千斤顶行程
-            
-            # 推进平均速度 (mm/min)
-            18: (0, 100),  # 推进平均速度
-            
-            # 刀盘转速 (r/min)
-            19: (0, 5),  # 刀盘转速
-            
-            # 刀盘扭矩 (kN·m)
-            20: (0, 10000),  # 刀盘扭矩
-            
-            # 刀盘电机扭矩 (%)
-            21: (0, 100),  # No.1刀盘电机扭矩
-            22: (0, 100),  # No.2刀盘电机扭矩
-            23: (0, 100),  # No.3刀盘电机扭矩
-            24: (0, 100),  # No.4刀盘电机扭矩
-            25: (0, 100),  # No.5刀盘电机扭矩
-            26: (0, 100),  # No.6刀盘电机扭矩
-            27: (0, 100),  # No.7刀盘电机扭矩
-            28: (0, 100),  # No.8刀盘电机扭矩
-            29: (0, 100),  # No.9刀盘电机扭矩
-            30: (0, 100),  # No.10刀盘电机扭矩
-        }
+        # 特征元数据和范围数组引用模块级常量，不在每个实例中重复构建
+        self.feature_names = FEATURE_NAMES
+        self.feature_units = FEATURE_UNITS
+        self._mins = _MINS
+        self._maxs = _MAXS
+        self._ext_mins = _EXT_MINS
+        self._ext_maxs = _EXT_MAXS
+        self._mids = _MIDS
         
         # 数据质量统计
         self.validation_stats = {
@@ -112,6 +137,10 @@ class DataValidator:
             'missing_data_count': 0,
             'anomaly_count': 0
         }
+        
+        # 验证报告缓存（统计信息变化后才重新计算）
+        self._stats_dirty = True
+        self._report_cache = None
     
     def validate_feature_data(self, data: np.ndarray) -> Dict[str, Any]:
         """
@@ -123,11 +152,11 @@ class DataValidator:
         Returns:
             验证结果字典
         """
-        self.validation_stats['total_validations'] += 1
-        
         if not isinstance(data, np.ndarray) or len(data) != 31:
             logger.error(f"数据格式错误: 期望31个特征，实际{len(data) if hasattr(data, '__len__') else 'N/A'}个")
+            self.validation_stats['total_validations'] += 1
             self.validation_stats['invalid_data_count'] += 1
+            self._stats_dirty = True
             return {
                 'is_valid': False,
                 'error_type': 'format_error',
@@ -136,72 +165,65 @@ class DataValidator:
                 'invalid_features': list(range(31))
             }
         
-        valid_count = 0
-        invalid_features = []
-        out_of_range_features = []
-        anomaly_features = []
-        
-        for i, value in enumerate(data):
-            if value is None or np.isnan(value):
-                invalid_features.append(i)
-                self.validation_stats['missing_data_count'] += 1
-                continue
-            
-            # 检查数值范围
-            if i in self.feature_ranges:
-                min_val, max_val = self.feature_ranges[i]
-                if not (min_val <= value <= max_val):
-                    out_of_range_features.append(i)
-                    self.validation_stats['out_of_range_count'] += 1
-                    logger.warning(f"特征 {i+1} ({self.feature_names[i]}) 超出范围: {value} (范围: {min_val}-{max_val})")
-                    continue
-            
-            # 检查异常值（使用3σ原则）
-            if self._is_anomaly(value, i):
-                anomaly_features.append(i)
-                self.validation_stats['anomaly_count'] += 1
-                logger.warning(f"特征 {i+1} ({self.feature_names[i]}) 检测到异常值: {value}")
-                continue
-            
-            valid_count += 1
-        
-        is_valid = valid_count >= 25  # 至少25个特征有效才认为数据可用
-        
-        if is_valid:
-            self.validation_stats['valid_data_count'] += 1
-        else:
-            self.validation_stats['invalid_data_count'] += 1
+        batch = self.validate_batch(np.asarray(data, dtype=np.float64)[None, :])
+        valid_count = int(batch['valid_counts'][0])
         
         return {
-            'is_valid': is_valid,
+            'is_valid': bool(batch['is_valid'][0]),
             'valid_count': valid_count,
-            'invalid_features': invalid_features,
-            'out_of_range_features': out_of_range_features,
-            'anomaly_features': anomaly_features,
+            'invalid_features': np.flatnonzero(batch['missing'][0]).tolist(),
+            'out_of_range_features': np.flatnonzero(batch['out_of_range'][0]).tolist(),
+            'anomaly_features': np.flatnonzero(batch['anomaly'][0]).tolist(),
             'quality_score': valid_count / 31 * 100
         }
     
-    def _is_anomaly(self, value: float, feature_index: int) -> bool:
+    def validate_batch(self, data: np.ndarray) -> Dict[str, Any]:
         """
-        检测异常值（简化版本）
+        批量验证多组特征数据（如5步滑动窗口或历史回放数据）
         
         Args:
-            value: 特征值
-            feature_index: 特征索引
+            data: 形状为(样本数, 31)的特征值数组，缺失值为NaN
             
         Returns:
-            是否为异常值
+            验证结果字典，各项均按样本排列:
+            - is_valid: 每个样本是否可用
+            - valid_counts: 每个样本的有效特征数
+            - missing/out_of_range/anomaly: 形状为(样本数, 31)的布尔掩码
+            - quality_scores: 每个样本的质量分数
         """
-        # 这里可以实现更复杂的异常检测算法
-        # 目前使用简单的范围检查
-        if feature_index in self.feature_ranges:
-            min_val, max_val = self.feature_ranges[feature_index]
-            # 允许超出范围20%的值
-            extended_min = min_val * 0.8
-            extended_max = max_val * 1.2
-            return not (extended_min <= value <= extended_max)
+        values = np.asarray(data, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != 31:
+            raise ValueError(f"数据格式错误: 期望形状(样本数, 31)，实际{values.shape}")
+        
+        missing, out_of_range, anomaly, valid_counts = range_masks(
+            values, self._mins, self._maxs, self._ext_mins, self._ext_maxs
+        )
+        is_valid = valid_counts >= 25  # 至少25个特征有效才认为数据可用
+        
+        # 统计信息按样本数累加
+        rows = values.shape[0]
+        self.validation_stats['total_validations'] += rows
+        self.validation_stats['missing_data_count'] += int(np.count_nonzero(missing))
+        self.validation_stats['out_of_range_count'] += int(np.count_nonzero(out_of_range))
+        self.validation_stats['anomaly_count'] += int(np.count_nonzero(anomaly))
+        self.validation_stats['valid_data_count'] += int(np.count_nonzero(is_valid))
+        self.validation_stats['invalid_data_count'] += int(rows - np.count_nonzero(is_valid))
+        self._stats_dirty = True
+        
+        # 只对有问题的特征逐个记录日志
+        for r, i in zip(*np.nonzero(out_of_range)):
+            logger.warning(f"特征 {i+1} ({self.feature_names[i]}) 超出范围: {values[r, i]} (范围: {_FEATURE_RANGES[i][0]}-{_FEATURE_RANGES[i][1]})")
+        for r, i in zip(*np.nonzero(anomaly)):
+            logger.warning(f"特征 {i+1} ({self.feature_names[i]}) 检测到异常值: {values[r, i]}")
         
-        return False
+        return {
+            'is_valid': is_valid,
+            'valid_counts': valid_counts,
+            'missing': missing,
+            'out_of_range': out_of_range,
+            'anomaly': anomaly,
+            'quality_scores': valid_counts / 31 * 100
+        }
     
     def clean_data(self, data: np.ndarray, validation_result: Dict[str, Any]) -> np.ndarray:
         """
@@ -214,33 +236,25 @@ class DataValidator:
         Returns:
             清洗后的数据
         """
-        cleaned_data = data.copy()
+        cleaned_data = np.array(data, dtype=np.float64)
         
-        # 处理缺失值
-        for i in validation_result.get('invalid_features', []):
-            if i in self.feature_ranges:
-                min_val, max_val = self.feature_ranges[i]
-                # 使用范围中值填充
-                cleaned_data[i] = (min_val + max_val) / 2
-                logger.info(f"特征 {i+1} 缺失值已用中值填充: {cleaned_data[i]}")
-            else:
-                cleaned_data[i] = 0.0
+        # 处理缺失值：使用范围中值填充
+        missing = np.asarray(validation_result.get('invalid_features', []), dtype=np.intp)
+        cleaned_data[missing] = self._mids[missing]
+        if missing.size:
+            logger.info(f"特征 {(missing + 1).tolist()} 缺失值已用中值填充")
         
-        # 处理超出范围的值
-        for i in validation_result.get('out_of_range_features', []):
-            if i in self.feature_ranges:
-                min_val, max_val = self.feature_ranges[i]
-                # 限制在合理范围内
-                cleaned_data[i] = np.clip(cleaned_data[i], min_val, max_val)
-                logger.info(f"特征 {i+1} 超出范围值已限制: {cleaned_data[i]}")
+        # 处理超出范围的值：限制在合理范围内
+        out_of_range = np.asarray(validation_result.get('out_of_range_features', []), dtype=np.intp)
+        cleaned_data[out_of_range] = np.clip(cleaned_data[out_of_range], self._mins[out_of_range], self._maxs[out_of_range])
+        if out_of_range.size:
+            logger.info(f"特征 {(out_of_range + 1).tolist()} 超出范围值已限制")
         
-        # 处理异常值
-        for i in validation_result.get('anomaly_features', []):
-            if i in self.feature_ranges:
-                min_val, max_val = self.feature_ranges[i]
-                # 使用范围中值替换异常值
-                cleaned_data[i] = (min_val + max_val) / 2
-                logger.info(f"特征 {i+1} 异常值已用中值替换: {cleaned_data[i]}")
+        # 处理异常值：使用范围中值替换
+        anomaly = np.asarray(validation_result.get('anomaly_features', []), dtype=np.intp)
+        cleaned_data[anomaly] = self._mids[anomaly]
+        if anomaly.size:
+            logger.info(f"特征 {(anomaly + 1).tolist()} 异常值已用中值替换")
         
         return cleaned_data
     
@@ -249,8 +263,20 @@ class DataValidator:
         获取验证报告
         
         Returns:
-            验证报告字典
+            验证报告字典（统计信息未变化时复用上次的计算结果，返回其副本，调用方修改不影响缓存）
         """
+        if self._stats_dirty or self._report_cache is None:
+            self._report_cache = self._build_validation_report()
+            self._stats_dirty = False
+        
+        report = dict(self._report_cache)
+        for key in ('quality_metrics', 'raw_stats'):
+            if key in report:
+                report[key] = dict(report[key])
+        return report
+    
+    def _build_validation_report(self) -> Dict[str, Any]:
+        """根据当前统计信息计算验证报告"""
         total = self.validation_stats['total_validations']
         if total == 0:
             return {
@@ -272,7 +298,7 @@ class DataValidator:
                 'out_of_range_rate': f"{out_of_range_rate:.2f}%",
                 'anomaly_rate': f"{anomaly_rate:.2f}%"
             },
-            'raw_stats': self.validation_stats
+            'raw_stats': dict(self.validation_stats)  # 快照，后续验证不改变已生成的报告
         }
     
     def reset_statistics(self):
@@ -285,6 +311,7 @@ class DataValidator:
             'missing_data_count': 0,
             'anomaly_count': 0
         }
+        self._stats_dirty = True
         logger.info("数据验证统计信息已重置")
 
 # =============================================================================
@@ -21,10 +21,79 @@ import logging.handlers
 import os
 import json
 import time
+import queue
+import atexit
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 日志级别名称映射
+LEVEL_MAP = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL
+}
+
+# 进程ID在进程生命周期内不变，只获取一次
+_PID = os.getpid()
+
+def _tail_lines(path, n: int, block_size: int = 8192) -> List[str]:
+    """
+    从文件末尾向前按块读取，返回最后n行（保留换行符）
+    
+    Args:
+        path: 文件路径
+        n: 行数
+        block_size: 每次读取的块大小(字节)
+        
+    Returns:
+        最后n行文本列表
+    """
+    with open(path, 'rb') as f:
+        if n <= 0:
+            data = f.read()
+        else:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            data = b''
+            # 多读到n个以上换行符为止，保证保留的第一行是完整的
+            while pos > 0 and data.count(b'\n') <= n:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+    lines = data.splitlines(keepends=True)
+    if n > 0:
+        lines = lines[-n:]
+    return [line.decode('utf-8', errors='replace') for line in lines]
+
+class _LazyJSON:
+    """延迟序列化包装器：只有日志真正输出时才执行JSON序列化"""
+    
+    __slots__ = ('data',)
+    
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+    
+    def __str__(self) -> str:
+        if ORJSON_AVAILABLE:
+            try:
+                return orjson.dumps(
+                    self.data, default=str,
+                    option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                ).decode('utf-8')
+            except orjson.JSONEncodeError:
+                pass  # orjson不支持的数据（如超大整数），退回标准库
+        return json.dumps(self.data, ensure_ascii=False, default=str)
+
 class EnhancedLogger:
     """增强日志记录器"""
     
@@ -43,19 +112,34 @@ class EnhancedLogger:
         self.log_dir.mkdir(exist_ok=True)
         
         # 设置日志级别
-        level_map = {
-            'DEBUG': logging.DEBUG,
-            'INFO': logging.INFO,
-            'WARNING': logging.WARNING,
-            'ERROR': logging.ERROR,
-            'CRITICAL': logging.CRITICAL
-        }
-        self.log_level = level_map.get(log_level.upper(), logging.INFO)
+        self.log_level = LEVEL_MAP.get(log_level.upper(), logging.INFO)
+        
+        # 日志格式
+        self._formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        
+        # 异步日志队列：各日志记录器只把记录放入队列，由后台监听线程统一写文件和控制台
+        self._log_queue = queue.Queue(-1)
+        self._output_handlers = []
+        
+        # 控制台处理器（所有日志记录器共用）
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(self._formatter)
+        self._output_handlers.append(console_handler)
         
         # 创建不同的日志记录器
         self.loggers = {}
         self._setup_loggers(max_file_size, backup_count)
         
+        # 启动唯一的写入线程，进程退出时处理完队列中剩余的日志
+        self._listener = logging.handlers.QueueListener(
+            self._log_queue, *self._output_handlers, respect_handler_level=True
+        )
+        self._listener.start()
+        atexit.register(self._listener.stop)
+        
         # 性能统计
         self.performance_stats = {
             'total_logs': 0,
@@ -74,13 +158,14 @@ class EnhancedLogger:
             backup_count
         )
         
-        # 错误日志记录器
+        # 错误日志记录器（错误日志文件同时接收所有记录器的ERROR及以上日志）
         self.loggers['error'] = self._create_logger(
             'error',
             'tbm_errors.log',
             max_file_size,
             backup_count,
-            level=logging.ERROR
+            level=logging.ERROR,
+            collect_all=True
         )
         
         # API日志记录器
@@ -108,8 +193,8 @@ class EnhancedLogger:
         )
     
     def _create_logger(self, name: str, filename: str, max_file_size: int, 
-                      backup_count: int, level: int = None) -> logging.Logger:
-        """创建日志记录器"""
+                      backup_count: int, level: int = None, collect_all: bool = False) -> logging.Logger:
+        """创建日志记录器（记录器只挂队列处理器，文件写入由监听线程完成）"""
         logger = logging.getLogger(name)
         logger.setLevel(level or self.log_level)
         
@@ -123,22 +208,17 @@ class EnhancedLogger:
             backupCount=backup_count,
             encoding='utf-8'
         )
+        file_handler.setFormatter(self._formatter)
+        if collect_all:
+            # 按级别接收所有记录器的日志
+            file_handler.setLevel(level or self.log_level)
+        else:
+            # 只接收本记录器的日志
+            file_handler.addFilter(logging.Filter(name))
+        self._output_handlers.append(file_handler)
         
-        # 控制台处理器
-        console_handler = logging.StreamHandler()
-        
-        # 设置格式
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-        
-        # 添加处理器
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        # 添加队列处理器
+        logger.addHandler(logging.handlers.QueueHandler(self._log_queue))
         
         # 防止重复日志
         logger.propagate = False
@@ -184,37 +264,41 @@ class EnhancedLogger:
         self.performance_stats['warning_count'] += 1
         self.performance_stats['total_logs'] += 1
     
-    def _log_with_context(self, logger: logging.Logger, level: str, message: str, **kwargs):
-        """带上下文的日志记录"""
+    def _is_enabled(self, logger_name: str, level: str) -> bool:
+        """判断指定日志记录器在该级别下是否会输出日志"""
+        return self.loggers[logger_name].isEnabledFor(LEVEL_MAP.get(level.upper(), logging.INFO))
+    
+    def _log_with_context(self, logger: logging.Logger, level: str, message: str, *args, **kwargs):
+        """带上下文的日志记录（时间戳由Formatter的asctime输出，无需另行生成）"""
         # 添加上下文信息
-        context = {
-            'timestamp': datetime.now().isoformat(),
-            'pid': os.getpid(),
-            **kwargs
-        }
+        context = {'pid': _PID, **kwargs}
+        level_upper = level.upper()
         
         # 记录日志
         log_method = getattr(logger, level.lower(), logger.info)
-        log_method(message, extra=context)
+        log_method(message, *args, extra=context)
         
         # 更新统计
         self.performance_stats['total_logs'] += 1
         
-        # 如果是错误或警告，也记录到错误日志
-        if level.upper() in ['ERROR', 'CRITICAL']:
-            self.loggers['error'].error(message, extra=context)
+        # 错误日志文件会按级别自动收到ERROR/CRITICAL日志，这里只更新统计
+        if level_upper in ('ERROR', 'CRITICAL'):
             self.performance_stats['error_count'] += 1
-        elif level.upper() == 'WARNING':
+        elif level_upper == 'WARNING':
             self.performance_stats['warning_count'] += 1
     
     def log_structured_data(self, data_type: str, data: Dict[str, Any], level: str = "INFO"):
-        """记录结构化数据"""
-        message = f"[{data_type}] {json.dumps(data, ensure_ascii=False, default=str)}"
-        self.log_system_event(level, message, data_type=data_type, **data)
+        """记录结构化数据（日志级别被过滤时不做序列化）"""
+        if not self._is_enabled('main', level):
+            return
+        self._log_with_context(self.loggers['main'], level, "[%s] %s", data_type, _LazyJSON(data),
+                               data_type=data_type, **data)
     
     def log_api_request(self, method: str, url: str, status_code: int, 
                        response_time: float, **kwargs):
         """记录API请求"""
+        if not self._is_enabled('api', "INFO"):
+            return
         data = {
             'method': method,
             'url': url,
@@ -227,6 +311,8 @@ class EnhancedLogger:
     def log_prediction_result(self, input_data: Dict[str, Any], 
                             prediction: Dict[str, Any], **kwargs):
         """记录预测结果"""
+        if not self._is_enabled('prediction', "INFO"):
+            return
         data = {
             'input_features': len(input_data.get('features', [])),
             'prediction_count': len(prediction.get('values', [])),
@@ -261,16 +347,20 @@ class EnhancedLogger:
     
     def cleanup_old_logs(self, days_to_keep: int = 30):
         """清理旧日志文件"""
-        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+        cutoff_ts = (datetime.now() - timedelta(days=days_to_keep)).timestamp()
         cleaned_files = 0
         
-        for log_file in self.log_dir.glob("*.log*"):
-            if log_file.stat().st_mtime < cutoff_date.timestamp():
+        # scandir在遍历目录时一并返回文件信息，无需对每个文件单独调用stat
+        with os.scandir(self.log_dir) as entries:
+            for entry in entries:
+                if '.log' not in entry.name or not entry.is_file():
+                    continue
                 try:
-                    log_file.unlink()
-                    cleaned_files += 1
+                    if entry.stat().st_mtime < cutoff_ts:
+                        os.unlink(entry.path)
+                        cleaned_files += 1
                 except Exception as e:
-                    self.log_error(f"清理日志文件失败: {log_file}", e)
+                    self.log_error(f"清理日志文件失败: {entry.path}", e)
         
         self.log_system_event("INFO", f"清理了 {cleaned_files} 个旧日志文件")
         return cleaned_files
@@ -283,9 +373,7 @@ class EnhancedLogger:
             return []
         
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                all_lines = f.readlines()
-                return all_lines[-lines:]
+            return _tail_lines(log_file, lines)
         except Exception as e:
             self.log_error(f"读取日志文件失败: {log_file}", e)
             return []
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数值计算内核模块 (fast_kernels.py)
+================================
+
+模块功能:
+- 提供热点路径上的小型数值计算内核
+- 安装了Numba时使用@njit编译(cache=True)，否则回退到NumPy实现
+
+模块职责:
+- 只做纯数值计算，不涉及打印、日志和时间处理
+- 缺失值统一使用NaN表示
+"""
+
+import os
+import numpy as np
+
+# Numba编译缓存目录（未在环境变量中指定时使用本模块目录下的.numba_cache）
+os.environ.setdefault(
+    'NUMBA_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.numba_cache')
+)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# =============================================================================
+# 数据变化检测内核
+# =============================================================================
+def _diff_mask_numpy(cur, prev, tol):
+    """diff_mask的NumPy实现（未安装Numba时使用）"""
+    delta = cur - prev
+    # NaN参与的比较结果为False，因此缺失值不会被计为变化
+    idx = np.flatnonzero(np.abs(delta) > tol)
+    delta = delta[idx]
+    base = np.abs(prev[idx])
+    pct = np.zeros(idx.size)
+    nonzero = base != 0
+    pct[nonzero] = delta[nonzero] / base[nonzero] * 100
+    return idx, delta, pct
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _diff_mask_jit(cur, prev, tol):
+        """diff_mask的Numba实现：单次遍历完成比较和计算"""
+        n = min(cur.shape[0], prev.shape[0])
+        idx = np.empty(n, dtype=np.int64)
+        delta = np.empty(n, dtype=np.float64)
+        pct = np.empty(n, dtype=np.float64)
+        count = 0
+        for i in range(n):
+            d = cur[i] - prev[i]
+            if abs(d) > tol:
+                idx[count] = i
+                delta[count] = d
+                base = abs(prev[i])
+                pct[count] = d / base * 100 if base != 0 else 0.0
+                count += 1
+        return idx[:count], delta[:count], pct[:count]
+
+
+def diff_mask(cur, prev, tol=1e-6):
+    """
+    比较两组特征值，找出发生变化的特征
+
+    Args:
+        cur (np.ndarray): 当前特征值(float64)，缺失值为NaN
+        prev (np.ndarray): 上次特征值(float64)，缺失值为NaN
+        tol (float): 变化阈值
+
+    Returns:
+        tuple: (indices, deltas, percents)
+            - indices: 发生变化的特征索引(int64)
+            - deltas: 变化量 cur - prev
+            - percents: 相对上次值的变化百分比（上次值为0时为0）
+    """
+    n = min(len(cur), len(prev))
+    cur = np.ascontiguousarray(cur[:n], dtype=np.float64)
+    prev = np.ascontiguousarray(prev[:n], dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        return _diff_mask_jit(cur, prev, tol)
+    return _diff_mask_numpy(cur, prev, tol)
+
+
+# =============================================================================
+# 特征范围校验内核
+# =============================================================================
+def _range_masks_numpy(data, mins, maxs, ext_mins, ext_maxs):
+    """range_masks的NumPy实现（未安装Numba时使用），data为二维(样本数, 特征数)"""
+    missing = np.isnan(data)
+    present = ~missing
+    out_of_range = present & ((data < mins) | (data > maxs))
+    in_range = present & ~out_of_range
+    anomaly = in_range & ((data < ext_mins) | (data > ext_maxs))
+    valid_counts = np.count_nonzero(in_range & ~anomaly, axis=1)
+    return missing, out_of_range, anomaly, valid_counts
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _range_masks_jit(data, mins, maxs, ext_mins, ext_maxs):
+        """range_masks的Numba实现：单次遍历完成缺失、越界和异常判定，data为二维(样本数, 特征数)"""
+        rows, n = data.shape
+        missing = np.zeros((rows, n), dtype=np.bool_)
+        out_of_range = np.zeros((rows, n), dtype=np.bool_)
+        anomaly = np.zeros((rows, n), dtype=np.bool_)
+        valid_counts = np.zeros(rows, dtype=np.int64)
+        for r in range(rows):
+            for i in range(n):
+                v = data[r, i]
+                if np.isnan(v):
+                    missing[r, i] = True
+                elif v < mins[i] or v > maxs[i]:
+                    out_of_range[r, i] = True
+                elif v < ext_mins[i] or v > ext_maxs[i]:
+                    anomaly[r, i] = True
+                else:
+                    valid_counts[r] += 1
+        return missing, out_of_range, anomaly, valid_counts
+
+
+def range_masks(data, mins, maxs, ext_mins, ext_maxs):
+    """
+    按特征范围校验特征值（支持单个样本或多个样本）
+
+    每个特征只归入一类，判定顺序为：缺失 → 超出范围 → 超出扩展范围（异常）
+
+    Args:
+        data (np.ndarray): 特征值(float64)，形状为(特征数,)或(样本数, 特征数)，缺失值为NaN
+        mins (np.ndarray): 各特征合理范围下限
+        maxs (np.ndarray): 各特征合理范围上限
+        ext_mins (np.ndarray): 各特征扩展范围下限
+        ext_maxs (np.ndarray): 各特征扩展范围上限
+
+    Returns:
+        tuple: (missing, out_of_range, anomaly, valid_count)
+            - missing/out_of_range/anomaly: 布尔掩码，形状与data相同
+            - valid_count: 通过全部检查的特征数量（一维输入返回int，二维输入返回每个样本的数量数组）
+    """
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    single = data.ndim == 1
+    if single:
+        data = data[None, :]
+    if NUMBA_AVAILABLE:
+        missing, out_of_range, anomaly, valid_counts = _range_masks_jit(data, mins, maxs, ext_mins, ext_maxs)
+    else:
+        missing, out_of_range, anomaly, valid_counts = _range_masks_numpy(data, mins, maxs, ext_mins, ext_maxs)
+    if single:
+        return missing[0], out_of_range[0], anomaly[0], int(valid_counts[0])
+    return missing, out_of_range, anomaly, valid_counts
+
+
+# =============================================================================
+# 滑动窗口更新内核
+# =============================================================================
+def _ring_insert_numpy(buffer, head, row, fill):
+    """ring_insert的NumPy实现（未安装Numba时使用）"""
+    target = buffer[head]
+    np.copyto(target, row)
+    missing = np.isnan(target)
+    target[missing] = fill[missing]
+    return (head + 1) % buffer.shape[0]
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _ring_insert_jit(buffer, head, row, fill):
+        """ring_insert的Numba实现：单次遍历完成缺失值替换和写入"""
+        for i in range(buffer.shape[1]):
+            v = row[i]
+            buffer[head, i] = fill[i] if np.isnan(v) else v
+        return (head + 1) % buffer.shape[0]
+
+
+def ring_insert(buffer, head, row, fill):
+    """
+    将一行新数据写入环形缓冲区（原地修改buffer）
+
+    Args:
+        buffer (np.ndarray): 环形缓冲区(float64, C连续)，形状为(时间步, 特征数)
+        head (int): 本次写入的行（即当前最早数据所在行）
+        row (np.ndarray): 新数据，缺失值为NaN（None会被转换为NaN）
+        fill (np.ndarray): 缺失值的替换值，长度与特征数相同
+
+    Returns:
+        int: 写入后新的head（下一次要覆盖的最早数据所在行）
+
+    Raises:
+        ValueError: row或fill的长度与特征数不一致
+    """
+    row = np.ascontiguousarray(row, dtype=np.float64)
+    # Numba编译的循环不做越界检查，长度不符时先报错（与NumPy实现的行为一致）
+    n = buffer.shape[1]
+    if row.shape != (n,) or fill.shape != (n,):
+        raise ValueError(
+            f"ring_insert: row{row.shape}和fill{fill.shape}的形状必须为({n},)"
+        )
+    if NUMBA_AVAILABLE:
+        return int(_ring_insert_jit(buffer, head, row, fill))
+    return _ring_insert_numpy(buffer, head, row, fill)
+
+
+# =============================================================================
+# 预编译
+# =============================================================================
+def precompile():
+    """
+    用小规模输入调用一次所有内核，触发Numba编译并写入磁盘缓存(NUMBA_CACHE_DIR)
+
+    安装依赖后执行一次 python fast_kernels.py，之后启动的进程直接从缓存加载，
+    首个请求不再承担JIT编译延迟
+
+    Returns:
+        bool: 是否使用了Numba（未安装时无需预编译）
+    """
+    if not NUMBA_AVAILABLE:
+        return False
+    # 只读数组（调用方共享的冻结数组）会生成单独的编译版本，两种都预先编译
+    writable = np.zeros(31)
+    readonly = np.zeros(31)
+    readonly.flags.writeable = False
+    for arr in (writable, readonly):
+        diff_mask(arr, arr)
+        range_masks(writable, arr, arr, arr, arr)
+        ring_insert(np.zeros((5, 31)), 0, arr, arr)
+    return True
+
+
+# =============================================================================
+# 程序入口
+# =============================================================================
+if __name__ == "__main__":
+    if precompile():
+        print(f"✅ 数值计算内核已编译并缓存到: {os.environ['NUMBA_CACHE_DIR']}")
+    else:
+        print("ℹ️  未安装Numba，使用NumPy实现，无需预编译")
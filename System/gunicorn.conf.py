@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gunicorn生产部署配置 (gunicorn.conf.py)
+=====================================
+
+使用方法（在System目录下执行，仅支持Linux/macOS）:
+    gunicorn -c gunicorn.conf.py app:app
+
+开发调试仍使用 python app.py
+
+部署说明:
+- 数据快照、滑动窗口缓冲区和预测模型都保存在进程内存中，
+  因此只启动1个worker进程，由该进程内的数据收集线程负责所有数据获取和预测
+- 安装了gevent时使用gevent worker：对TBM API的请求和日志写入等I/O等待变为协作式让出，
+  单个worker即可承载大量并发连接；未安装时退回gthread线程worker
+"""
+
+import importlib.util
+
+# =============================================================================
+# 服务配置
+# =============================================================================
+bind = '0.0.0.0:5000'
+
+# 全局状态在进程内存中，不能使用多个worker（否则每个进程各自拉取数据、各自预测）
+workers = 1
+
+if importlib.util.find_spec('gevent') is not None:
+    worker_class = 'gevent'
+    worker_connections = 1000
+else:
+    worker_class = 'gthread'
+    threads = 8
+
+# 首次请求前需要加载模型并初始化缓冲区，适当放宽超时时间
+timeout = 120
+graceful_timeout = 30
+
+# =============================================================================
+# 生命周期钩子
+# =============================================================================
+def post_worker_init(worker):
+    """worker进程初始化完成后启动数据收集线程（每个worker进程只启动一次）"""
+    from app import start_data_collection
+    start_data_collection()
+    worker.log.info("数据收集线程已启动")
+
+def worker_exit(server, worker):
+    """worker退出时通知数据收集线程停止"""
+    import app
+    app.is_running = False
+    app.stop_event.set()
@@ -19,12 +19,18 @@ TBM盾构机预测系统 (main.py)
 # =============================================================================
 # 导入依赖库
 # =============================================================================
+import atexit
+import io
+import queue
+import sys
+import threading
 import numpy as np
 import time
-import random
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 from predict import ModelPredictor  # 导入预测模块
 from api_client import TBMAPIClient  # 导入API客户端模块
+from fast_kernels import ring_insert  # 导入数值计算内核
 
 
 # =============================================================================
@@ -43,6 +49,13 @@ DATA_MODE = 3           # 数据获取模式: 1=随机生成, 2=API获取+0填
 ENABLE_DATA_LOGGING = True    # 是否启用数据记录功能
 LOG_DATA_TO_FILE = True       # 是否记录数据到文件
 LOG_PREDICTIONS_TO_FILE = True # 是否记录预测到文件
+LOG_BUFFER_SIZE = 64 * 1024   # 记录文件写缓冲区大小(字节)
+LOG_FLUSH_EVERY_N = 1         # 每写入N条记录刷新一次缓冲区（1表示每条记录都落盘）
+LOG_BATCH_SIZE = 64           # 待写入记录达到该数量时立即批量写入
+LOG_WRITER_QUEUE_SIZE = 1024  # 写文件线程队列容量（队列满时丢弃记录并计数）
+
+# 输出配置
+VERBOSE = True                # 是否在终端输出逐项预测结果和缺失特征（关闭后仅记录到文件）
 
 # 特征名称定义
 FEATURE_NAMES = [
@@ -55,6 +68,22 @@ FEATURE_NAMES = [
     'No.6刀盘电机扭矩', 'No.7刀盘电机扭矩', 'No.8刀盘电机扭矩', 'No.9刀盘电机扭矩', 'No.10刀盘电机扭矩'
 ]
 
+# 模拟数据取值范围（与FEATURE_NAMES逐项对齐）
+SIM_LO = np.array([0.5]*5 + [0.1]*4 + [10]*4 + [5000] + [100]*4 + [20, 0.5, 1000] + [20]*10, dtype=np.float64)
+SIM_HI = np.array([3.0]*5 + [0.8]*4 + [50]*4 + [15000] + [2000]*4 + [80, 2.5, 5000] + [100]*10, dtype=np.float64)
+
+# 数据记录格式（表头和行模板只构建一次）
+DATA_LOG_HEADER = ("时间戳\t步数\t" + "\t".join([f"特征{i+1}_{name}" for i, name in enumerate(FEATURE_NAMES)]) + "\n").encode('utf-8')
+PREDICTION_LOG_HEADER = ("时间戳\t步数\t" + "\t".join([f"预测{i+1}_{name}" for i, name in enumerate(FEATURE_NAMES)]) + "\n").encode('utf-8')
+LOG_ROW_FORMAT = "%s\t%d\t" + "\t".join(["%.6f"] * FEATURE_NUM) + "\n"
+
+# 缓冲区中缺失值的替换值（只读）
+ZERO_FILL = np.zeros(FEATURE_NUM)
+ZERO_FILL.flags.writeable = False
+
+# 预测结果输出的行标签
+PREDICTION_LABELS = [f"特征{(i+1):2d} {name:<20}: " for i, name in enumerate(FEATURE_NAMES)]
+
 # =============================================================================
 # TBM预测系统主类
 # =============================================================================
@@ -73,17 +102,33 @@ class TBMPredictor:
         """初始化预测系统"""
         self.model = ModelPredictor()                    # 预测模块实例
         self.api_client = TBMAPIClient()                 # API客户端实例
-        self.buffer = np.zeros((INPUT_LENGTH, FEATURE_NUM))  # 滑动窗口缓冲区
+        self.buffer = np.zeros((INPUT_LENGTH, FEATURE_NUM))  # 滑动窗口缓冲区（环形）
+        self._head = 0                                   # 环形缓冲区中最早数据所在行
         self.step_count = 0                              # 步数计数器
         self.last_data = None                            # 上次生成的数据
         self.last_prediction = None                      # 上次预测结果
         self.last_api_data = None                        # 上次API获取的数据
         self.data_mode = DATA_MODE                       # 数据获取模式
         self.buffer_initialized = False                  # 缓冲区是否已初始化
+        self.verbose = VERBOSE                           # 是否输出逐项预测结果和缺失特征
+        self._rng = np.random.default_rng()              # 随机数生成器
+        self._data_min = None                            # 模型数据范围下限（模型加载后缓存）
+        self._data_max = None                            # 模型数据范围上限（模型加载后缓存）
         
         # 数据记录功能
         self.data_log_file = None                        # 数据记录文件
         self.prediction_log_file = None                  # 预测记录文件
+        self._data_log_handle = None                     # 数据记录文件句柄（常驻打开）
+        self._prediction_log_handle = None               # 预测记录文件句柄（常驻打开）
+        self.flush_every_n = LOG_FLUSH_EVERY_N           # 每N条记录刷新一次
+        self._unflushed_count = 0                        # 未刷新的记录数
+        self._log_queue_data = deque()                   # 待写入的数据记录 (时间戳, 步数, 数据)
+        self._log_queue_predictions = deque()            # 待写入的预测记录 (时间戳, 步数, 数据)
+        self._writer_q = None                            # 写文件线程队列 (文件句柄, 字节数据, 记录数)
+        self._writer_thread = None                       # 写文件线程
+        self._dropped_log_count = 0                      # 因队列已满丢弃的记录数
+        self._ts_cache_sec = 0                           # 时间戳缓存对应的秒
+        self._ts_cache_str = ""                          # 缓存的时间戳字符串
         self.enable_logging = ENABLE_DATA_LOGGING        # 是否启用数据记录
         self.log_data = LOG_DATA_TO_FILE                 # 是否记录数据
         self.log_predictions = LOG_PREDICTIONS_TO_FILE   # 是否记录预测
@@ -104,20 +149,22 @@ class TBMPredictor:
             # 创建带时间戳的文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            # 根据配置创建文件
+            # 根据配置创建文件，文件句柄保持打开直到记录关闭
             if self.log_data:
                 self.data_log_file = f"tbm_data_{timestamp}.txt"
-                with open(self.data_log_file, 'w', encoding='utf-8') as f:
-                    # 写入表头
-                    header = "时间戳\t步数\t" + "\t".join([f"特征{i+1}_{name}" for i, name in enumerate(FEATURE_NAMES)])
-                    f.write(header + "\n")
+                self._data_log_handle = io.open(self.data_log_file, 'ab', buffering=LOG_BUFFER_SIZE)
+                self._data_log_handle.write(DATA_LOG_HEADER)
             
             if self.log_predictions:
                 self.prediction_log_file = f"tbm_predictions_{timestamp}.txt"
-                with open(self.prediction_log_file, 'w', encoding='utf-8') as f:
-                    # 写入表头
-                    header = "时间戳\t步数\t" + "\t".join([f"预测{i+1}_{name}" for i, name in enumerate(FEATURE_NAMES)])
-                    f.write(header + "\n")
+                self._prediction_log_handle = io.open(self.prediction_log_file, 'ab', buffering=LOG_BUFFER_SIZE)
+                self._prediction_log_handle.write(PREDICTION_LOG_HEADER)
+            
+            # 文件写入放到独立线程，主循环不会被磁盘IO阻塞
+            self._start_log_writer()
+            
+            # 程序异常退出时也要把缓冲区写入文件
+            atexit.register(self._close_data_logging)
             
             print(f"📝 数据记录配置:")
             print(f"   启用记录: {self.enable_logging}")
@@ -130,12 +177,13 @@ class TBMPredictor:
             
         except Exception as e:
             print(f"❌ 数据记录初始化失败: {e}")
+            self._close_log_handles()
             self.data_log_file = None
             self.prediction_log_file = None
     
     def _log_data(self, data, step_count, data_type="current"):
         """
-        记录数据到文件
+        记录数据到文件（先放入待写入队列，由_flush_log_queue批量写入）
         
         Args:
             data: 数据数组
@@ -152,36 +200,170 @@ class TBMPredictor:
         if data_type == "prediction" and not self.log_predictions:
             return
         
-        # 检查文件是否存在
-        if data_type == "current" and not self.data_log_file:
-            return
-        if data_type == "prediction" and not self.prediction_log_file:
+        # 检查文件是否已打开
+        if data_type == "current":
+            handle, pending = self._data_log_handle, self._log_queue_data
+        else:
+            handle, pending = self._prediction_log_handle, self._log_queue_predictions
+        if handle is None:
             return
         
+        # 保存float64副本（None转为NaN），调用方后续修改数组不影响记录内容
+        # 整体为None或不是一维数组时按整行缺失记录
+        row = None if data is None else np.array(data, dtype=np.float64)
+        if row is None or row.ndim != 1:
+            row = np.full(FEATURE_NUM, np.nan)
+        timestamp = self._fast_timestamp()
+        pending.append((timestamp, step_count, row))
+        
+        # 队列积压过多时立即写入
+        if len(pending) >= LOG_BATCH_SIZE:
+            self._flush_log_queue()
+    
+    def _fast_timestamp(self):
+        """
+        获取当前时间戳字符串（同一秒内复用缓存，避免重复格式化）
+        
+        Returns:
+            str: 格式为 "%Y-%m-%d %H:%M:%S" 的时间戳
+        """
+        now = int(time.time())
+        if now != self._ts_cache_sec:
+            self._ts_cache_sec = now
+            self._ts_cache_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        return self._ts_cache_str
+    
+    def _flush_log_queue(self):
+        """将待写入队列中的记录格式化后交给写文件线程（在主循环空闲时调用）"""
+        streams = (
+            (self._log_queue_data, self._data_log_handle),
+            (self._log_queue_predictions, self._prediction_log_handle),
+        )
+        for pending, handle in streams:
+            if not pending:
+                continue
+            lines = []
+            while pending:
+                timestamp, step_count, data = pending.popleft()
+                # 逐条捕获异常，单条记录格式化失败不影响同批其他记录
+                try:
+                    if data.size == FEATURE_NUM and not np.isnan(data).any():
+                        # 快速路径：长度正确且无缺失值时用预构建的模板一次格式化整行
+                        lines.append(LOG_ROW_FORMAT % (timestamp, step_count, *data.tolist()))
+                    else:
+                        # 含缺失值（或长度不是FEATURE_NUM）时逐项格式化，缺失值记为None
+                        data_str = "\t".join(["None" if val != val else f"{val:.6f}" for val in data.tolist()])
+                        lines.append(f"{timestamp}\t{step_count}\t{data_str}\n")
+                except Exception as e:
+                    print(f"⚠️  数据记录失败: {e}")
+            if handle is None or not lines:
+                continue
+            self._submit_log_write(handle, "".join(lines).encode('utf-8'), len(lines))
+    
+    def _submit_log_write(self, handle, payload, count):
+        """
+        将格式化好的记录交给写文件线程，不等待写入完成
+        
+        Args:
+            handle: 目标文件句柄
+            payload (bytes): 已编码的记录内容
+            count (int): 记录条数
+        """
+        if self._writer_q is None:
+            # 写文件线程未启动时直接写入
+            self._write_log_payload(handle, payload, count)
+            return
         try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            if data_type == "current" and self.data_log_file:
-                # 记录当前数据
-                with open(self.data_log_file, 'a', encoding='utf-8') as f:
-                    data_str = "\t".join([f"{val:.6f}" if val is not None else "None" for val in data])
-                    f.write(f"{timestamp}\t{step_count}\t{data_str}\n")
-            
-            elif data_type == "prediction" and self.prediction_log_file:
-                # 记录预测数据
-                with open(self.prediction_log_file, 'a', encoding='utf-8') as f:
-                    data_str = "\t".join([f"{val:.6f}" if val is not None else "None" for val in data])
-                    f.write(f"{timestamp}\t{step_count}\t{data_str}\n")
-                    
+            self._writer_q.put_nowait((handle, payload, count))
+        except queue.Full:
+            self._dropped_log_count += count
+    
+    def _write_log_payload(self, handle, payload, count):
+        """写入一批记录，每N条记录刷新一次缓冲区"""
+        try:
+            handle.write(payload)
+            self._unflushed_count += count
+            if self._unflushed_count >= self.flush_every_n:
+                self._flush_log_handles()
         except Exception as e:
             print(f"⚠️  数据记录失败: {e}")
     
+    def _start_log_writer(self):
+        """启动写文件线程"""
+        self._writer_q = queue.Queue(maxsize=LOG_WRITER_QUEUE_SIZE)
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="tbm-log-writer", daemon=True)
+        self._writer_thread.start()
+    
+    def _writer_loop(self):
+        """写文件线程：取出队列中的记录，按文件合并后写入，收到None时退出"""
+        writer_q = self._writer_q
+        while True:
+            try:
+                batch = [writer_q.get(timeout=1)]
+            except queue.Empty:
+                continue
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(writer_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            # 同一文件的多批记录合并为一次写入
+            stop = False
+            merged = {}
+            for item in batch:
+                if item is None:
+                    stop = True
+                    continue
+                handle, payload, count = item
+                entry = merged.setdefault(handle, [[], 0])
+                entry[0].append(payload)
+                entry[1] += count
+            for handle, (payloads, count) in merged.items():
+                self._write_log_payload(handle, b"".join(payloads), count)
+            
+            if stop:
+                return
+    
+    def _stop_log_writer(self):
+        """通知写文件线程写完剩余记录后退出"""
+        if self._writer_thread is None:
+            return
+        try:
+            self._writer_q.put(None, timeout=2)
+        except queue.Full:
+            pass
+        self._writer_thread.join(timeout=2)
+        self._writer_thread = None
+        self._writer_q = None
+    
+    def _flush_log_handles(self):
+        """将记录文件缓冲区写入磁盘"""
+        for handle in (self._data_log_handle, self._prediction_log_handle):
+            if handle is not None:
+                handle.flush()
+        self._unflushed_count = 0
+    
+    def _close_log_handles(self):
+        """关闭记录文件句柄（可重复调用）"""
+        for attr in ('_data_log_handle', '_prediction_log_handle'):
+            handle = getattr(self, attr)
+            if handle is not None:
+                setattr(self, attr, None)
+                handle.close()
+        self._unflushed_count = 0
+    
     def _close_data_logging(self):
-        """关闭数据记录"""
-        if not self.enable_logging:
+        """关闭数据记录（主动结束和atexit都会调用，只执行一次）"""
+        if self._data_log_handle is None and self._prediction_log_handle is None:
             return
             
         try:
+            self._flush_log_queue()
+            self._stop_log_writer()
+            self._close_log_handles()
+            if self._dropped_log_count:
+                print(f"⚠️  写入队列已满，共丢弃 {self._dropped_log_count} 条记录")
             if self.data_log_file and self.log_data:
                 print(f"📝 数据记录已保存到: {self.data_log_file}")
             if self.prediction_log_file and self.log_predictions:
@@ -189,7 +371,7 @@ class TBMPredictor:
         except Exception as e:
             print(f"⚠️  关闭数据记录时出错: {e}")
     
-    def set_logging_config(self, enable_logging=None, log_data=None, log_predictions=None):
+    def set_logging_config(self, enable_logging=None, log_data=None, log_predictions=None, flush_every_n=None):
         """
         动态设置记录配置
         
@@ -197,6 +379,7 @@ class TBMPredictor:
             enable_logging (bool): 是否启用记录功能
             log_data (bool): 是否记录数据
             log_predictions (bool): 是否记录预测
+            flush_every_n (int): 每写入N条记录刷新一次缓冲区
         """
         if enable_logging is not None:
             self.enable_logging = enable_logging
@@ -204,11 +387,14 @@ class TBMPredictor:
             self.log_data = log_data
         if log_predictions is not None:
             self.log_predictions = log_predictions
+        if flush_every_n is not None:
+            self.flush_every_n = max(1, int(flush_every_n))
         
         print(f"📝 记录配置已更新:")
         print(f"   启用记录: {self.enable_logging}")
         print(f"   记录数据: {self.log_data}")
         print(f"   记录预测: {self.log_predictions}")
+        print(f"   刷新间隔: 每{self.flush_every_n}条记录")
     
     # =========================================================================
     # 系统初始化模块
@@ -220,7 +406,11 @@ class TBMPredictor:
         Returns:
             bool: 加载成功返回True，失败返回False
         """
-        return self.model.load_model()
+        if not self.model.load_model():
+            return False
+        # 数据范围在模型加载后不再变化，缓存下来供随机数据生成和填充使用
+        self._data_min, self._data_max = self.model.get_data_range()
+        return True
     
     def test_api_connection(self):
         """
@@ -299,28 +489,8 @@ class TBMPredictor:
         return True
     
     def _generate_simulated_data(self):
-        """生成模拟数据"""
-        data = []
-        for i in range(FEATURE_NUM):
-            if i < 5:  # 贯入度和推进压力 (MPa)
-                data.append(random.uniform(0.5, 3.0))
-            elif i < 9:  # 土舱土压 (MPa)
-                data.append(random.uniform(0.1, 0.8))
-            elif i < 13:  # 推进千斤顶速度 (mm/min)
-                data.append(random.uniform(10, 50))
-            elif i == 13:  # 推进油缸总推力 (kN)
-                data.append(random.uniform(5000, 15000))
-            elif i < 18:  # 推进千斤顶行程 (mm)
-                data.append(random.uniform(100, 2000))
-            elif i == 18:  # 推进平均速度 (mm/min)
-                data.append(random.uniform(20, 80))
-            elif i == 19:  # 刀盘转速 (r/min)
-                data.append(random.uniform(0.5, 2.5))
-            elif i == 20:  # 刀盘扭矩 (kN·m)
-                data.append(random.uniform(1000, 5000))
-            else:  # 刀盘电机扭矩 (%)
-                data.append(random.uniform(20, 100))
-        return np.array(data)
+        """生成模拟数据（各特征取值范围见SIM_LO/SIM_HI）"""
+        return self._rng.uniform(SIM_LO, SIM_HI)
     
     def set_data_mode(self, mode):
         """
@@ -349,105 +519,95 @@ class TBMPredictor:
         从API获取真实数据
         
         Returns:
-            np.ndarray: API获取的数据，缺失值用None表示
+            np.ndarray: API获取的数据(float64)，缺失值用NaN表示
         """
         print("📡 正在从API获取数据...")
         
         try:
-            # 使用API客户端获取最新特征数据
+            # 使用API客户端获取最新特征数据（float64，缺失值为NaN）
             api_data = self.api_client.get_latest_features()
+            if api_data is None:
+                return np.full(FEATURE_NUM, np.nan)
+            api_data = np.asarray(api_data, dtype=np.float64)
             
             # 检查数据是否与上一次相同
             if self.last_api_data is not None:
                 if self._is_data_same(api_data, self.last_api_data):
                     print("⚠️  检测到API数据与上一次相同，认为没有获取到新数据")
-                    # 返回全None数组表示没有新数据
-                    return np.full(FEATURE_NUM, None)
+                    # 返回全NaN数组表示没有新数据
+                    return np.full(FEATURE_NUM, np.nan)
             
-            # 保存当前数据作为下次比较的基准
-            self.last_api_data = api_data.copy() if api_data is not None else None
+            # 保存当前数据作为下次比较的基准（新建的数组，设为只读后直接共享，无需复制）
+            api_data.flags.writeable = False
+            self.last_api_data = api_data
             return api_data
             
         except Exception as e:
             print(f"❌ API数据获取失败: {e}")
-            # 返回全None数组表示获取失败
-            return np.full(FEATURE_NUM, None)
+            # 返回全NaN数组表示获取失败
+            return np.full(FEATURE_NUM, np.nan)
     
     def _is_data_same(self, data1, data2):
         """
         比较两次API数据是否相同
         
         Args:
-            data1 (np.ndarray): 当前API数据
-            data2 (np.ndarray): 上次API数据
+            data1 (np.ndarray): 当前API数据，缺失值为NaN
+            data2 (np.ndarray): 上次API数据，缺失值为NaN
             
         Returns:
             bool: 如果数据相同返回True，否则返回False
         """
-        if data1 is None and data2 is None:
+        if data1 is data2:
             return True
         if data1 is None or data2 is None:
             return False
         
-        # 比较有效数据（非None值）
-        for i in range(FEATURE_NUM):
-            val1 = data1[i]
-            val2 = data2[i]
-            
-            # 如果两个值都是None，认为相同
-            if val1 is None and val2 is None:
-                continue
-            
-            # 如果一个是None另一个不是，认为不同
-            if val1 is None or val2 is None:
-                return False
-            
-            # 比较数值（考虑浮点数精度）
-            if abs(val1 - val2) > 1e-6:
-                return False
-        
-        return True
+        # 缺失位置必须一致，有效数据逐项比较（考虑浮点数精度）
+        mask1 = np.isnan(data1)
+        mask2 = np.isnan(data2)
+        if not np.array_equal(mask1, mask2):
+            return False
+        return np.allclose(data1[~mask1], data2[~mask2], rtol=0, atol=1e-6)
     
     def fill_missing_data(self, api_data, fill_mode):
         """
         填充缺失数据
         
         Args:
-            api_data (np.ndarray): API获取的数据
+            api_data (np.ndarray): API获取的数据，缺失值为NaN
             fill_mode (int): 填充模式
             
         Returns:
-            np.ndarray: 填充后的完整数据
-        """
-        filled_data = api_data.copy()
-        
-        for i in range(FEATURE_NUM):
-            if api_data[i] is None:  # 数据缺失
-                if fill_mode == 2:  # 用0填充
-                    filled_data[i] = 0.0
-                    print(f"  ⚠️  特征{i+1}缺失，用0填充")
-                    
-                elif fill_mode == 3:  # 用随机值填充
-                    if self.model.is_loaded:
-                        data_min, data_max = self.model.get_data_range()
-                        filled_data[i] = random.uniform(data_min[i], data_max[i])
-                    else:
-                        filled_data[i] = random.uniform(0, 100)
-                    print(f"  ⚠️  特征{i+1}缺失，用随机值填充")
-                    
-                elif fill_mode == 4:  # 用预测值填充
-                    if self.last_prediction is not None:
-                        filled_data[i] = self.last_prediction[i]
-                        print(f"  ⚠️  特征{i+1}缺失，用预测值填充")
-                    else:
-                        # 没有预测值时用随机值
-                        if self.model.is_loaded:
-                            data_min, data_max = self.model.get_data_range()
-                            filled_data[i] = random.uniform(data_min[i], data_max[i])
-                        else:
-                            filled_data[i] = random.uniform(0, 100)
-                        print(f"  ⚠️  特征{i+1}缺失，用随机值填充（无预测值）")
+            np.ndarray: 填充后的完整数据(float64)
+        """
+        filled_data = np.array(api_data, dtype=np.float64)
+        mask = np.isnan(filled_data)
+        if not mask.any():
+            return filled_data
+        
+        if fill_mode == 2:  # 用0填充
+            filled_data[mask] = 0.0
+            fill_name = "0"
+            
+        elif fill_mode == 4 and self.last_prediction is not None:  # 用预测值填充
+            filled_data[mask] = self.last_prediction[mask]
+            fill_name = "预测值"
+            
+        elif fill_mode in (3, 4):  # 用随机值填充（模式4无预测值时同样使用随机值）
+            if self.model.is_loaded:
+                filled_data[mask] = self._rng.uniform(self._data_min[mask], self._data_max[mask])
+            else:
+                filled_data[mask] = self._rng.uniform(0, 100, size=int(mask.sum()))
+            fill_name = "随机值" if fill_mode == 3 else "随机值（无预测值）"
+            
+        else:
+            return filled_data
         
+        # 缺失特征汇总为一行输出，关闭详细输出时不再格式化
+        if self.verbose:
+            missing = (np.flatnonzero(mask) + 1).tolist()
+            print(f"  ⚠️  缺失特征({len(missing)}): {missing}，用{fill_name}填充")
         return filled_data
     
     def generate_data(self):
@@ -480,56 +640,48 @@ class TBMPredictor:
         """
         # 模型未加载时生成随机数据
         if not self.model.is_loaded:
-            return np.random.rand(FEATURE_NUM) * 100
+            return self._rng.random(FEATURE_NUM) * 100
         
-        # 获取数据范围
-        data_min, data_max = self.model.get_data_range()
-        data = np.zeros(FEATURE_NUM)
-        
-        for i in range(FEATURE_NUM):
-            min_val = data_min[i]
-            max_val = data_max[i]
-            
-            if self.last_data is not None:
-                # 基于历史数据生成（添加±10%变化）
-                base_value = self.last_data[i]
-                variation = base_value * 0.1 * (random.random() - 0.5) * 2
-                data[i] = max(min_val, min(max_val, base_value + variation))
-            else:
-                # 首次生成，使用随机值
-                data[i] = random.uniform(min_val, max_val)
+        if self.last_data is not None:
+            # 基于历史数据生成（添加±10%变化），并限制在数据范围内
+            variation = self.last_data * 0.1 * (self._rng.random(FEATURE_NUM) - 0.5) * 2
+            data = np.clip(self.last_data + variation, self._data_min, self._data_max)
+        else:
+            # 首次生成，使用随机值
+            data = self._rng.uniform(self._data_min, self._data_max)
         
-        self.last_data = data.copy()
+        # 新生成的数组设为只读后直接保存引用，无需复制
+        data.flags.writeable = False
+        self.last_data = data
         return data
     
     def update_buffer(self, new_data):
         """
-        更新滑动窗口缓冲区
+        更新滑动窗口缓冲区（新数据覆盖最早的一行，不移动其余数据）
         
         Args:
             new_data (np.ndarray): 新的数据点
         """
-        # 左移数据
-        self.buffer[:-1] = self.buffer[1:]
-        
-        # 添加新数据 - 处理None值
-        if new_data is not None:
-            # 将None值替换为0，避免nan问题
-            processed_data = []
-            for val in new_data:
-                if val is None:
-                    processed_data.append(0.0)
-                else:
-                    processed_data.append(float(val))
-            self.buffer[-1] = processed_data
-        else:
-            # 如果新数据为None，用0填充
-            self.buffer[-1] = [0.0] * FEATURE_NUM
+        # 添加新数据 - 直接写入缓冲区对应行，缺失值(None/NaN)替换为0，避免nan问题
+        # 如果新数据为None，整行用0填充
+        row_data = ZERO_FILL if new_data is None else new_data
+        self._head = ring_insert(self.buffer, self._head, row_data, ZERO_FILL)
         self.step_count += 1
         
         # 记录当前数据
         self._log_data(new_data, self.step_count, "current")
     
+    def _chronological_view(self):
+        """
+        按时间顺序（从早到晚）返回缓冲区数据
+        
+        Returns:
+            np.ndarray: 形状为 (INPUT_LENGTH, FEATURE_NUM) 的输入窗口
+        """
+        if self._head == 0:
+            return self.buffer
+        return np.concatenate((self.buffer[self._head:], self.buffer[:self._head]))
+    
     # =========================================================================
     # 预测执行模块
     # =========================================================================
@@ -544,7 +696,8 @@ class TBMPredictor:
             np.ndarray: 预测结果
         """
         prediction = self.model.predict(input_data)
-        self.last_prediction = prediction.copy()  # 保存预测结果用于填充
+        prediction.flags.writeable = False
+        self.last_prediction = prediction  # 保存预测结果用于填充（只读，直接共享引用）
         
         # 记录预测数据
         self._log_data(prediction, self.step_count, "prediction")
@@ -556,23 +709,36 @@ class TBMPredictor:
     # =========================================================================
     def print_prediction(self, pred_values, step):
         """
-        打印预测结果
+        打印预测结果（整块拼接后一次写入终端）
         
         Args:
             pred_values (np.ndarray): 预测值数组
             step (int): 预测步数
         """
-        print(f"\n步骤 {step} - 时间: {datetime.now().strftime('%H:%M:%S')}")
-        print("预测结果 (基于t-4到t预测t+1):")
-        print("=" * 80)
+        if not self.verbose:
+            return
         
-        for i in range(FEATURE_NUM):
-            print(f"特征{(i+1):2d} {FEATURE_NAMES[i]:<20}: {pred_values[i]:8.3f}")
-        print("=" * 80)
+        lines = [
+            f"\n步骤 {step} - 时间: {self._fast_timestamp()[11:]}",
+            "预测结果 (基于t-4到t预测t+1):",
+            "=" * 80,
+        ]
+        lines.extend(f"{label}{value:8.3f}" for label, value in zip(PREDICTION_LABELS, pred_values.tolist()))
+        lines.append("=" * 80)
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
     
     # =========================================================================
     # 主程序控制模块
     # =========================================================================
+    def _seconds_until_next_fetch(self):
+        """计算距离下一个拉取时刻（每分钟第DATA_FETCH_SECOND秒）的秒数"""
+        now = datetime.now()
+        target = now.replace(second=DATA_FETCH_SECOND, microsecond=0)
+        if target <= now:
+            target += timedelta(minutes=1)
+        return (target - now).total_seconds()
+    
     def run(self):
         """
         主运行循环
@@ -618,29 +784,27 @@ class TBMPredictor:
         try:
             # 步骤5: 主循环
             while True:
+                # 5.1 等待前将积压的记录交给写文件线程，然后直接睡到下一个拉取时刻（每分钟第10秒）
+                self._flush_log_queue()
+                time.sleep(self._seconds_until_next_fetch())
+                
                 current_time = datetime.now()
-                current_second = current_time.second
+                print(f"\n🕐 时间: {current_time.strftime('%H:%M:%S')} - 开始拉取数据")
+                
+                # 5.2 生成新数据
+                new_data = self.generate_data()
                 
-                # 检查是否到了每分钟的第10秒
-                if current_second == DATA_FETCH_SECOND:
-                    print(f"\n🕐 时间: {current_time.strftime('%H:%M:%S')} - 开始拉取数据")
-                    
-                    # 5.1 生成新数据
-                    new_data = self.generate_data()
-                    
-                    # 5.2 更新滑动窗口（挤掉最早的数据）
-                    self.update_buffer(new_data)
-                    
-                    # 5.3 执行预测（缓冲区已初始化，可以直接预测）
-                    prediction = self.predict(self.buffer)
-                    self.print_prediction(prediction, self.step_count - INPUT_LENGTH + 1)
+                # 5.3 更新滑动窗口（挤掉最早的数据）
+                self.update_buffer(new_data)
                 
-                # 3.4 等待1秒后检查时间
-                time.sleep(1)
+                # 5.4 执行预测（缓冲区已初始化，可以直接预测）
+                prediction = self.predict(self._chronological_view())
+                self.print_prediction(prediction, self.step_count - INPUT_LENGTH + 1)
                 
         except KeyboardInterrupt:
             # 步骤4: 处理中断信号
             print(f"\n程序结束 - 总步数: {self.step_count}")
+            self._flush_log_queue()
             self._close_data_logging()
 
 
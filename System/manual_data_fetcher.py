@@ -9,27 +9,27 @@
 import sys
 import os
 import json
-import time
-import requests
+import re
 from datetime import datetime
-import numpy as np
 
 # 添加当前目录到Python路径，以便导入api_client
+# api_client（连带requests/numpy）在第一次拉取数据时才导入，--help和直接退出不承担导入开销
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 try:
-    from api_client import TBMAPIClient
-except ImportError as e:
-    print(f"❌ 无法导入api_client: {e}")
-    print(f"📁 当前目录: {current_dir}")
-    print(f"📋 目录内容: {os.listdir(current_dir)}")
-    sys.exit(1)
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 特征值字符串的数值部分（后面可以跟括号括起的单位，如 "12.5(MPa)"）
+_NUMERIC_RE = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(?:\(|$)')
 
 class ManualDataFetcher:
     def __init__(self):
         """初始化手动数据拉取器"""
-        self.api_client = TBMAPIClient()
+        self.api_client = None  # 第一次拉取数据时创建
         
         # 根据tbm_feature_mapping_correctified.csv的特征映射
         self.feature_mapping = {
@@ -66,9 +66,26 @@ class ManualDataFetcher:
             31: ("No.10刀盘电机扭矩", "date55")
         }
         
+        # 按特征序号展开为两个并行列表，显示时直接按顺序遍历
+        self._feat_names = [self.feature_mapping[i][0] for i in sorted(self.feature_mapping)]
+        self._feat_keys = [self.feature_mapping[i][1] for i in sorted(self.feature_mapping)]
+        
         print("🔧 手动数据拉取器初始化完成")
         print("=" * 60)
     
+    def _get_api_client(self):
+        """获取API客户端（第一次调用时导入api_client并创建实例）"""
+        if self.api_client is None:
+            try:
+                from api_client import TBMAPIClient
+            except ImportError as e:
+                print(f"❌ 无法导入api_client: {e}")
+                print(f"📁 当前目录: {current_dir}")
+                print(f"📋 目录内容: {os.listdir(current_dir)}")
+                sys.exit(1)
+            self.api_client = TBMAPIClient()
+        return self.api_client
+    
     def fetch_and_display_data(self):
         """拉取并显示数据"""
         try:
@@ -76,7 +93,7 @@ class ManualDataFetcher:
             print("-" * 60)
             
             # 获取最新数据
-            api_response = self.api_client.fetch_data_by_time_range(
+            api_response = self._get_api_client().fetch_data_by_time_range(
                 begin_time=None,
                 end_time=None,
                 limit=2  # 获取2条记录，选择最新的
@@ -90,8 +107,8 @@ class ManualDataFetcher:
             print(f"📊 获取到 {len(records)} 条记录")
             print("-" * 60)
             
-            # 选择ID最大的记录（最新的）
-            latest_record = max(records, key=lambda x: int(x.get('id', 0)))
+            # 接口按时间倒序返回，第一条即为最新记录
+            latest_record = records[0]
             
             # 显示原始记录信息
             print("🔍 原始记录信息:")
@@ -103,7 +120,8 @@ class ManualDataFetcher:
             # 解析data字段
             data_str = latest_record.get('data', '{}')
             try:
-                data_dict = json.loads(data_str)
+                # orjson的解析错误是json.JSONDecodeError的子类
+                data_dict = orjson.loads(data_str) if ORJSON_AVAILABLE else json.loads(data_str)
                 print(f"   数据字段数量: {len(data_dict)}")
             except json.JSONDecodeError as e:
                 print(f"   ❌ 数据解析失败: {e}")
@@ -130,28 +148,22 @@ class ManualDataFetcher:
             print("-" * 60)
             
             valid_count = 0
-            for i in range(1, 32):  # 1到31
-                if i in self.feature_mapping:
-                    feature_name, transmission_name = self.feature_mapping[i]
-                    
-                    # 从data_dict中获取值
-                    if transmission_name in data_dict:
-                        value_str = data_dict[transmission_name]
-                        try:
-                            # 提取数值部分（去掉单位和括号）
-                            if '(' in value_str:
-                                numeric_value = float(value_str.split('(')[0])
-                            else:
-                                numeric_value = float(value_str)
-                            
-                            print(f"   {i:2d}. {feature_name:20s}: {numeric_value:>10.6f} ({transmission_name})")
-                            valid_count += 1
-                        except ValueError:
-                            print(f"   {i:2d}. {feature_name:20s}: {'解析失败':>10s} ({transmission_name}: {value_str})")
-                    else:
-                        print(f"   {i:2d}. {feature_name:20s}: {'缺失':>10s} ({transmission_name})")
-                else:
-                    print(f"   {i:2d}. {'特征' + str(i):20s}: {'未定义':>10s}")
+            for i, (feature_name, transmission_name) in enumerate(zip(self._feat_names, self._feat_keys), 1):
+                # 从data_dict中获取值
+                value_str = data_dict.get(transmission_name)
+                if value_str is None:
+                    print(f"   {i:2d}. {feature_name:20s}: {'缺失':>10s} ({transmission_name})")
+                    continue
+                
+                # 提取数值部分（去掉单位和括号）
+                match = _NUMERIC_RE.match(str(value_str))
+                if match is None:
+                    print(f"   {i:2d}. {feature_name:20s}: {'解析失败':>10s} ({transmission_name}: {value_str})")
+                    continue
+                
+                numeric_value = float(match.group(1))
+                print(f"   {i:2d}. {feature_name:20s}: {numeric_value:>10.6f} ({transmission_name})")
+                valid_count += 1
             
             print("-" * 60)
             print(f"✅ 数据拉取完成！有效特征: {valid_count}/31")
@@ -203,13 +215,11 @@ def main():
     print("🔧 TBM手动数据拉取器")
     print("=" * 60)
     
-    fetcher = ManualDataFetcher()
-    
-    # 检查命令行参数
+    # 检查命令行参数（帮助和未知参数无需创建拉取器）
     if len(sys.argv) > 1:
         if sys.argv[1] in ['--fetch', '-f']:
             # 直接拉取一次数据
-            fetcher.fetch_and_display_data()
+            ManualDataFetcher().fetch_and_display_data()
         elif sys.argv[1] in ['--help', '-h']:
             print("💡 使用方法:")
             print("   python manual_data_fetcher.py          # 交互式模式")
@@ -220,7 +230,7 @@ def main():
             print("💡 使用 --help 查看帮助")
     else:
         # 交互式模式
-        fetcher.run_interactive()
+        ManualDataFetcher().run_interactive()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -149,12 +149,12 @@ class TBMDataMonitor {
 
     // 更新数据
     updateData(data) {
-        if (!data || !data.features) {
+        const columns = this.toColumns(data);
+        if (!columns) {
             console.warn('无效的数据格式');
             return;
         }
 
-        const features = data.features;
         const stepCount = data.step_count || 0;
         const bufferReady = data.buffer_ready || false;
         
@@ -164,10 +164,10 @@ class TBMDataMonitor {
 
         // 先更新所有显示，但不更新lastValues
         FEATURE_CONFIG.forEach(feature => {
-            const featureData = features[feature.id - 1];
-            const currentValue = featureData.current_value;
-            const currentSource = featureData.current_source;
-            const predictionValue = featureData.prediction_value;
+            const index = feature.id - 1;
+            const currentValue = columns.currentValues[index];
+            const currentSource = columns.currentSources[index];
+            const predictionValue = columns.predictionValues[index];
             
             // 确定当前值状态
             const currentStatus = this.determineDataStatus(currentValue);
@@ -187,8 +187,7 @@ class TBMDataMonitor {
 
         // 所有显示更新完成后，再更新lastValues
         FEATURE_CONFIG.forEach(feature => {
-            const featureData = features[feature.id - 1];
-            const currentValue = featureData.current_value;
+            const currentValue = columns.currentValues[feature.id - 1];
             if (currentValue !== null && currentValue !== undefined) {
                 this.lastValues[feature.id] = currentValue;
             }
@@ -202,7 +201,35 @@ class TBMDataMonitor {
         this.updateStepInfo(stepCount, bufferReady);
         
         // 保存当前数据用于趋势计算
-        this.lastData = features;
+        this.lastData = columns.currentValues;
+    }
+
+    // 将接口数据统一转换为按列存储的数组
+    // 后端返回列式数组（current_values等），模拟数据和旧接口返回features数组
+    toColumns(data) {
+        if (!data) {
+            return null;
+        }
+        if (Array.isArray(data.current_values)) {
+            return {
+                currentValues: data.current_values,
+                currentSources: data.current_sources || [],
+                predictionValues: data.prediction_values || []
+            };
+        }
+        if (!Array.isArray(data.features)) {
+            return null;
+        }
+        const currentValues = [];
+        const currentSources = [];
+        const predictionValues = [];
+        data.features.forEach(item => {
+            const isObject = item !== null && typeof item === 'object';
+            currentValues.push(isObject ? (item.current_value !== undefined ? item.current_value : item.value) : item);
+            currentSources.push(isObject ? item.current_source : undefined);
+            predictionValues.push(isObject ? item.prediction_value : undefined);
+        });
+        return { currentValues, currentSources, predictionValues };
     }
 
 
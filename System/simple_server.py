@@ -5,11 +5,30 @@
 """
 
 import json
-import random
+import logging
+import os
 import time
 from datetime import datetime
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 import threading
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 请求日志 - 请求路径上的输出走logging，默认只输出WARNING及以上
+# 调试时可通过环境变量 TBM_SERVER_LOG_LEVEL=DEBUG 打开每次请求的日志
+logger = logging.getLogger('tbm.server')
+logger.setLevel(os.getenv('TBM_SERVER_LOG_LEVEL', 'WARNING').upper())
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                                                datefmt='%Y-%m-%d %H:%M:%S'))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
 
 # 特征配置
 FEATURE_NAMES = [
@@ -32,7 +51,36 @@ FEATURE_UNITS = [
     '%', '%', '%', '%', '%', '%', '%', '%', '%', '%'
 ]
 
+# 真实值生成范围（与FEATURE_NAMES逐项对齐）
+REAL_LO = np.array([0.5]*5 + [0.1]*4 + [10]*4 + [5000] + [100]*4 + [5]*3 + [20]*10, dtype=np.float64)
+REAL_HI = np.array([3.0]*5 + [0.8]*4 + [50]*4 + [25000] + [1500]*4 + [30]*3 + [80]*10, dtype=np.float64)
+
+# 共享随机数生成器
+_rng = np.random.default_rng()
+
+def _dumps(payload):
+    """序列化为UTF-8编码的JSON字节串 - 优先使用orjson（C实现，直接输出bytes）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+# 特征配置响应内容固定不变，启动时序列化一次
+_FEATURES_BODY = _dumps({
+    'features': [
+        {'id': i + 1, 'name': name, 'unit': unit}
+        for i, (name, unit) in enumerate(zip(FEATURE_NAMES, FEATURE_UNITS))
+    ]
+})
+
+# /api/tbm-data响应合并窗口(秒)：窗口内到达的请求共用同一份已序列化的数据
+TBM_DATA_CACHE_WINDOW = 0.1
+_payload_cache = {'t': float('-inf'), 'body': b''}
+_payload_lock = threading.Lock()
+
 class TBMRequestHandler(SimpleHTTPRequestHandler):
+    # 所有响应都带Content-Length，客户端可以保持连接复用
+    protocol_version = 'HTTP/1.1'
+    
     def end_headers(self):
         # 添加CORS头
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -40,6 +88,23 @@ class TBMRequestHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         super().end_headers()
     
+    def log_message(self, format, *args):
+        """访问日志改走logger（默认级别下不输出）"""
+        logger.debug("%s - " + format, self.address_string(), *args)
+    
+    def log_error(self, format, *args):
+        """请求错误日志"""
+        logger.warning("%s - " + format, self.address_string(), *args)
+    
+    def _send_json(self, body):
+        """发送JSON响应（body为已序列化的字节串）"""
+        send_header = self.send_header
+        self.send_response(200)
+        send_header('Content-type', 'application/json')
+        send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def do_GET(self):
         if self.path == '/api/tbm-data':
             self.handle_tbm_data()
@@ -51,153 +116,120 @@ class TBMRequestHandler(SimpleHTTPRequestHandler):
             super().do_GET()
     
     def handle_tbm_data(self):
-        """处理TBM数据请求 - 模拟真实API数据场景"""
-        print(f"📡 收到数据请求: {datetime.now().strftime('%H:%M:%S')}")
+        """处理TBM数据请求 - 合并窗口内的请求直接返回缓存的数据"""
+        logger.debug("📡 收到数据请求")
+        
+        now = time.monotonic()
+        if now - _payload_cache['t'] > TBM_DATA_CACHE_WINDOW:
+            with _payload_lock:
+                # 等锁期间其他线程可能已经刷新过缓存
+                if now - _payload_cache['t'] > TBM_DATA_CACHE_WINDOW:
+                    _payload_cache['body'] = self._build_tbm_data_body()
+                    _payload_cache['t'] = time.monotonic()
+        
+        self._send_json(_payload_cache['body'])
+    
+    def _build_tbm_data_body(self):
+        """生成一份TBM数据并序列化 - 模拟真实API数据场景"""
+        now_iso = datetime.now().isoformat()
         
         # 模拟API数据的特点：
         # 1. 数据通常是整批的（要么全部有，要么全部没有）
         # 2. 数据通常是几天前的历史数据
         # 3. 如果有数据，基本所有特征都有数据
         
-        rand = random.random()
+        rand = _rng.random()
         
         if rand < 0.3:  # 30%概率有完整的API数据（历史数据）
-            # 生成整批数据，所有特征都有值
-            features = []
-            for i in range(31):
-                value = self._generate_realistic_value(i)
-                features.append(value)  # 直接返回数值，表示真实API数据
-            print("📡 模拟API返回完整历史数据")
+            # 生成整批数据，所有特征都有值（31个特征一次生成）
+            features = self._generate_realistic_values()
+            logger.debug("📡 模拟API返回完整历史数据")
             
         elif rand < 0.6:  # 30%概率有部分API数据（部分特征缺失）
-            # 生成部分数据，模拟API部分字段缺失
-            features = []
-            missing_features = random.sample(range(31), random.randint(5, 15))  # 随机缺失5-15个特征
-            
-            for i in range(31):
-                if i in missing_features:
-                    features.append(None)  # 缺失数据
-                else:
-                    value = self._generate_realistic_value(i)
-                    features.append(value)
-            print(f"📡 模拟API返回部分数据，缺失{len(missing_features)}个特征")
+            # 生成部分数据，模拟API部分字段缺失（缺失值为NaN）
+            features = self._generate_realistic_values()
+            missing_features = _rng.choice(31, _rng.integers(5, 16), replace=False)  # 随机缺失5-15个特征
+            features[missing_features] = np.nan
+            logger.debug("📡 模拟API返回部分数据，缺失%d个特征", len(missing_features))
             
         else:  # 40%概率没有API数据
             # 全部缺失，需要填充
-            features = [None] * 31
-            print("📡 模拟API无数据，需要填充")
+            features = np.full(31, np.nan)
+            logger.debug("📡 模拟API无数据，需要填充")
         
         # 应用智能填充逻辑
         processed_features = self._process_data_with_smart_filling(features)
         
         data = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now_iso,
             'features': processed_features
         }
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
-        print(f"✅ 返回数据: {len(processed_features)} 个特征")
+        logger.debug("✅ 生成数据: %d 个特征", len(processed_features))
+        return _dumps(data)
     
-    def _generate_realistic_value(self, feature_index):
-        """生成符合特征类型的真实值"""
-        if feature_index < 5:  # 贯入度和推进压力 (MPa)
-            return random.uniform(0.5, 3.0)
-        elif feature_index < 9:  # 土舱土压 (MPa)
-            return random.uniform(0.1, 0.8)
-        elif feature_index < 13:  # 推进千斤顶速度 (mm/min)
-            return random.uniform(10, 50)
-        elif feature_index == 13:  # 推进油缸总推力 (kN)
-            return random.uniform(5000, 25000)
-        elif feature_index < 18:  # 推进千斤顶行程 (mm)
-            return random.uniform(100, 1500)
-        elif feature_index < 21:  # 推进平均速度, 刀盘转速, 刀盘扭矩
-            return random.uniform(5, 30)
-        else:  # 刀盘电机扭矩 (%)
-            return random.uniform(20, 80)
+    def _generate_realistic_values(self):
+        """生成31个符合特征类型的真实值（各特征取值范围见REAL_LO/REAL_HI）"""
+        return _rng.uniform(REAL_LO, REAL_HI)
     
     def _process_data_with_smart_filling(self, raw_data):
-        """处理数据 - 智能填充逻辑（模拟真实API数据场景）"""
-        processed_data = []
-        
-        for i, current_value in enumerate(raw_data):
-            if current_value is None:
-                # 缺失数据，使用预测值填充
-                filled_value = self._generate_filled_value(i, None)
-                processed_data.append({
-                    'value': filled_value,
-                    'predicted': True,
-                    'original': None,
-                    'reason': 'missing'
-                })
-            else:
-                # 有API数据，但由于是历史数据，标记为填充
-                # 在实际应用中，这里可能是真实的API数据
-                filled_value = self._generate_filled_value(i, current_value)
-                processed_data.append({
-                    'value': filled_value,
-                    'predicted': True,
-                    'original': current_value,
-                    'reason': 'historical'
-                })
+        """处理数据 - 智能填充逻辑（模拟真实API数据场景，缺失值为NaN）"""
+        raw = np.asarray(raw_data, dtype=np.float64)
+        missing = np.isnan(raw)
         
-        return processed_data
-    
-    def _generate_filled_value(self, feature_id, original_value):
-        """生成填充值"""
-        # 基于原始值或生成合理的默认值
-        if original_value is not None:
-            base_value = original_value
+        # 有API数据的以原始值为基准，缺失数据以生成的真实值为基准
+        # 全部有值/全部缺失两种整批情况直接取基准，无需按掩码合并
+        any_missing = missing.any()
+        all_missing = any_missing and missing.all()
+        if not any_missing:
+            base = raw
+        elif all_missing:
+            base = self._generate_realistic_values()
         else:
-            base_value = self._generate_realistic_value(feature_id)
+            base = np.where(missing, self._generate_realistic_values(), raw)
         
-        # 添加小幅随机变化，模拟真实填充
-        variation = base_value * 0.05 * (random.random() - 0.5) * 2  # ±5%变化
-        filled_value = base_value + variation
+        # 添加小幅随机变化（±5%），模拟真实填充，并限制在合理范围内
+        filled = base + base * 0.05 * (_rng.random(31) - 0.5) * 2
+        np.clip(filled, np.maximum(0, base * 0.7), base * 1.3, out=filled)
         
-        # 确保在合理范围内
-        min_value = max(0, base_value * 0.7)
-        max_value = base_value * 1.3
-        
-        return max(min_value, min(max_value, filled_value))
+        # 缺失数据使用预测值填充；有API数据但由于是历史数据，同样标记为填充
+        if not any_missing:
+            return [
+                {'value': value, 'predicted': True, 'original': original, 'reason': 'historical'}
+                for value, original in zip(filled.tolist(), raw.tolist())
+            ]
+        if all_missing:
+            return [
+                {'value': value, 'predicted': True, 'original': None, 'reason': 'missing'}
+                for value in filled.tolist()
+            ]
+        return [
+            {'value': value, 'predicted': True, 'original': None, 'reason': 'missing'}
+            if is_missing else
+            {'value': value, 'predicted': True, 'original': original, 'reason': 'historical'}
+            for value, original, is_missing in zip(filled.tolist(), raw.tolist(), missing.tolist())
+        ]
     
     def handle_status(self):
         """处理状态请求"""
+        now_iso = datetime.now().isoformat()
         data = {
             'status': 'running',
             'api_available': True,
             'data_mode': 4,
-            'last_update': datetime.now().isoformat()
+            'last_update': now_iso
         }
         
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        self._send_json(_dumps(data))
     
     def handle_features(self):
-        """处理特征配置请求"""
-        features = []
-        for i, (name, unit) in enumerate(zip(FEATURE_NAMES, FEATURE_UNITS)):
-            features.append({
-                'id': i + 1,
-                'name': name,
-                'unit': unit
-            })
-        
-        data = {'features': features}
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        """处理特征配置请求（返回预先序列化的响应）"""
+        self._send_json(_FEATURES_BODY)
 
 def main():
     port = 8000
     server_address = ('', port)
-    httpd = HTTPServer(server_address, TBMRequestHandler)
+    httpd = ThreadingHTTPServer(server_address, TBMRequestHandler)  # 每个请求由独立线程处理
     
     print("🚀 启动简化TBM监控服务器...")
     print(f"🌐 访问地址: http://localhost:{port}")
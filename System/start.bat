@@ -18,6 +18,10 @@ if %errorlevel% neq 0 (
     echo 警告: 依赖包安装可能有问题，但继续启动...
 )
 
+echo.
+echo 正在预编译数值计算内核...
+python fast_kernels.py
+
 echo.
 echo 正在启动Web服务器...
 echo 系统将在 http://localhost:5000 启动
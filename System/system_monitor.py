@@ -21,24 +21,39 @@ import time
 import psutil
 import logging
 import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Callable
+from typing import Deque, Dict, Any, Optional, Callable
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
-class HealthStatus(Enum):
-    """健康状态枚举"""
-    HEALTHY = "healthy"
-    WARNING = "warning"
-    CRITICAL = "critical"
-    UNKNOWN = "unknown"
+# 告警记录上限（超出后丢弃最早的告警）
+MAX_ALERTS = 10_000
 
-@dataclass
+# CPU使用率的最短统计窗口(秒)，距上次采样不足该时间时结果不可靠，跳过本次CPU指标
+CPU_MIN_SAMPLE_WINDOW = 0.1
+
+class HealthStatus(IntEnum):
+    """健康状态枚举（按严重程度取整数值，可直接比较大小）"""
+    UNKNOWN = -1
+    HEALTHY = 0
+    WARNING = 1
+    CRITICAL = 2
+    
+    @property
+    def label(self) -> str:
+        """状态名称（小写字符串，用于对外输出）"""
+        return self.name.lower()
+
+# 按越过的阈值个数索引状态：0=正常，1=超过警告阈值，2=超过严重阈值
+_STATUS = (HealthStatus.HEALTHY, HealthStatus.WARNING, HealthStatus.CRITICAL)
+
+@dataclass(slots=True, frozen=True)
 class HealthMetric:
-    """健康指标数据类"""
+    """健康指标数据类（每次更新都创建新实例，不可修改）"""
     name: str
     value: float
     unit: str
@@ -47,9 +62,9 @@ class HealthMetric:
     threshold_critical: float
     timestamp: datetime
 
-@dataclass
+@dataclass(slots=True)
 class SystemAlert:
-    """系统告警数据类"""
+    """系统告警数据类（resolved会在解决告警时修改，因此不冻结）"""
     level: str
     component: str
     message: str
@@ -72,11 +87,16 @@ class SystemMonitor:
         
         # 健康指标
         self.health_metrics: Dict[str, HealthMetric] = {}
-        self.alerts: List[SystemAlert] = []
+        self.alerts: Deque[SystemAlert] = deque(maxlen=MAX_ALERTS)
+        # 未解决告警计数，创建/解决告警时维护，获取状态时无需遍历告警列表
+        self._active_warning = 0
+        self._active_critical = 0
+        # 告警队列和计数由监控线程和调用方线程共同修改，统一用锁保护
+        self._alert_lock = threading.Lock()
         
-        # 性能历史记录
-        self.performance_history: List[Dict[str, Any]] = []
+        # 性能历史记录（超出上限时自动丢弃最早的记录）
         self.max_history_size = 1000
+        self.performance_history: Deque[Dict[str, Any]] = deque(maxlen=self.max_history_size)
         
         # 恢复策略
         self.recovery_strategies: Dict[str, Callable] = {}
@@ -93,6 +113,13 @@ class SystemMonitor:
             'api_error_rate_threshold': 20.0
         }
         
+        # 预热CPU计数器：之后cpu_percent(interval=None)返回自上次调用以来的使用率，不再阻塞等待
+        psutil.cpu_percent(interval=None)
+        self._cpu_sampled_at = time.monotonic()
+        
+        # 缓存本进程句柄
+        self._proc = psutil.Process()
+        
         logger.info("系统监控器初始化完成")
     
     def start_monitoring(self):
@@ -117,6 +144,7 @@ class SystemMonitor:
         """监控循环"""
         while self.is_running:
             try:
+                # 各检查函数在各自的异常处理内采样，单项采样失败不影响其他检查
                 self._check_system_health()
                 self._check_api_health()
                 self._check_memory_usage()
@@ -129,18 +157,36 @@ class SystemMonitor:
                 logger.error(f"监控循环异常: {e}")
                 time.sleep(self.check_interval)
     
+    def _sample_cpu_percent(self) -> Optional[float]:
+        """
+        采样CPU使用率（非阻塞，统计窗口为两次采样之间的时间）
+        
+        Returns:
+            Optional[float]: CPU使用率，距上次采样不足CPU_MIN_SAMPLE_WINDOW时返回None
+        """
+        sampled_at = time.monotonic()
+        if sampled_at - self._cpu_sampled_at < CPU_MIN_SAMPLE_WINDOW:
+            return None
+        self._cpu_sampled_at = sampled_at
+        return psutil.cpu_percent(interval=None)
+    
     def _check_system_health(self):
         """检查系统健康状态"""
         try:
-            # CPU使用率
-            cpu_percent = psutil.cpu_percent(interval=1)
-            self._update_metric(
-                'cpu_usage',
-                cpu_percent,
-                '%',
-                self.monitor_config['cpu_threshold_warning'],
-                self.monitor_config['cpu_threshold_critical']
-            )
+            # 本次检查的三个指标共用同一个时间戳
+            now = datetime.now()
+            
+            # CPU使用率（None表示本周期没有有效采样）
+            cpu_percent = self._sample_cpu_percent()
+            if cpu_percent is not None:
+                self._update_metric(
+                    'cpu_usage',
+                    cpu_percent,
+                    '%',
+                    self.monitor_config['cpu_threshold_warning'],
+                    self.monitor_config['cpu_threshold_critical'],
+                    now
+                )
             
             # 内存使用率
             memory = psutil.virtual_memory()
@@ -150,7 +196,8 @@ class SystemMonitor:
                 memory_percent,
                 '%',
                 self.monitor_config['memory_threshold_warning'],
-                self.monitor_config['memory_threshold_critical']
+                self.monitor_config['memory_threshold_critical'],
+                now
             )
             
             # 磁盘使用率
@@ -159,13 +206,14 @@ class SystemMonitor:
             except OSError:
                 # Windows系统使用当前目录
                 disk = psutil.disk_usage('.')
-            disk_percent = (disk.used / disk.total) * 100
+            disk_percent = disk.percent
             self._update_metric(
                 'disk_usage',
                 disk_percent,
                 '%',
                 self.monitor_config['disk_threshold_warning'],
-                self.monitor_config['disk_threshold_critical']
+                self.monitor_config['disk_threshold_critical'],
+                now
             )
             
         except Exception as e:
@@ -180,8 +228,7 @@ class SystemMonitor:
     def _check_memory_usage(self):
         """检查内存使用情况"""
         try:
-            process = psutil.Process()
-            memory_info = process.memory_info()
+            memory_info = self._proc.memory_info()
             memory_mb = memory_info.rss / 1024 / 1024
             
             self._update_metric(
@@ -198,9 +245,9 @@ class SystemMonitor:
     def _check_disk_usage(self):
         """检查磁盘使用情况"""
         try:
-            # 检查当前目录磁盘使用
+            # 检查当前目录（程序运行所在的文件系统）磁盘使用
             disk = psutil.disk_usage('.')
-            disk_gb = disk.used / 1024 / 1024 / 1024
+            disk_gb = disk.used / (1 << 30)
             
             self._update_metric(
                 'disk_used',
@@ -214,15 +261,14 @@ class SystemMonitor:
             logger.error(f"磁盘使用检查失败: {e}")
     
     def _update_metric(self, name: str, value: float, unit: str, 
-                      threshold_warning: float, threshold_critical: float):
-        """更新健康指标"""
+                      threshold_warning: float, threshold_critical: float,
+                      now: Optional[datetime] = None):
+        """更新健康指标（now为本次检查的时间戳，未提供时取当前时间）"""
+        if now is None:
+            now = datetime.now()
+        
         # 确定状态
-        if value >= threshold_critical:
-            status = HealthStatus.CRITICAL
-        elif value >= threshold_warning:
-            status = HealthStatus.WARNING
-        else:
-            status = HealthStatus.HEALTHY
+        status = _STATUS[(value >= threshold_warning) + (value >= threshold_critical)]
         
         # 创建或更新指标
         metric = HealthMetric(
@@ -232,17 +278,18 @@ class SystemMonitor:
             status=status,
             threshold_warning=threshold_warning,
             threshold_critical=threshold_critical,
-            timestamp=datetime.now()
+            timestamp=now
         )
         
         self.health_metrics[name] = metric
         
         # 检查是否需要告警
-        if status in [HealthStatus.WARNING, HealthStatus.CRITICAL]:
-            self._create_alert(name, status, value, threshold_warning, threshold_critical)
+        if status >= HealthStatus.WARNING:
+            self._create_alert(name, status, value, threshold_warning, threshold_critical, now)
     
     def _create_alert(self, component: str, status: HealthStatus, 
-                     value: float, threshold_warning: float, threshold_critical: float):
+                     value: float, threshold_warning: float, threshold_critical: float,
+                     now: Optional[datetime] = None):
         """创建告警"""
         level = "WARNING" if status == HealthStatus.WARNING else "CRITICAL"
         threshold = threshold_critical if status == HealthStatus.CRITICAL else threshold_warning
@@ -251,15 +298,33 @@ class SystemMonitor:
             level=level,
             component=component,
             message=f"{component} 当前值: {value:.2f}, 阈值: {threshold:.2f}",
-            timestamp=datetime.now()
+            timestamp=now if now is not None else datetime.now()
         )
         
-        self.alerts.append(alert)
+        with self._alert_lock:
+            # 队列已满时最早的告警会被丢弃，若未解决需同步计数
+            if len(self.alerts) == self.alerts.maxlen:
+                self._release_alert(self.alerts[0])
+            self.alerts.append(alert)
+            if level == "WARNING":
+                self._active_warning += 1
+            else:
+                self._active_critical += 1
         logger.warning(f"系统告警: {alert.message}")
         
         # 尝试自动恢复
         self._attempt_recovery(component, status)
     
+    def _release_alert(self, alert: SystemAlert):
+        """将告警标记为已解决并更新未解决告警计数（调用方需持有_alert_lock）"""
+        if alert.resolved:
+            return
+        alert.resolved = True
+        if alert.level == "WARNING":
+            self._active_warning -= 1
+        else:
+            self._active_critical -= 1
+    
     def _attempt_recovery(self, component: str, status: HealthStatus):
         """尝试自动恢复"""
         if component in self.recovery_strategies:
@@ -276,51 +341,52 @@ class SystemMonitor:
         logger.info(f"为组件 {component} 注册恢复策略")
     
     def _cleanup_old_data(self):
-        """清理旧数据"""
-        # 清理旧的性能历史记录
-        if len(self.performance_history) > self.max_history_size:
-            self.performance_history = self.performance_history[-self.max_history_size:]
-        
-        # 清理已解决的旧告警
+        """清理旧数据（性能历史记录由deque自动限长，无需清理）"""
+        # 清理已解决的旧告警（无论位置，与未解决告警的先后无关）
         current_time = datetime.now()
-        self.alerts = [
-            alert for alert in self.alerts 
-            if not alert.resolved or (current_time - alert.timestamp).seconds < 3600
-        ]
+        with self._alert_lock:
+            self.alerts = deque(
+                (alert for alert in self.alerts
+                 if not alert.resolved or (current_time - alert.timestamp).total_seconds() < 3600),
+                maxlen=MAX_ALERTS
+            )
     
     def get_health_status(self) -> Dict[str, Any]:
         """获取系统健康状态"""
-        # 计算整体健康状态
-        if not self.health_metrics:
-            overall_status = HealthStatus.UNKNOWN
-        else:
-            statuses = [metric.status for metric in self.health_metrics.values()]
-            if HealthStatus.CRITICAL in statuses:
-                overall_status = HealthStatus.CRITICAL
-            elif HealthStatus.WARNING in statuses:
-                overall_status = HealthStatus.WARNING
-            else:
-                overall_status = HealthStatus.HEALTHY
+        now = datetime.now()
         
-        # 统计告警
-        active_alerts = [alert for alert in self.alerts if not alert.resolved]
-        warning_count = len([alert for alert in active_alerts if alert.level == "WARNING"])
-        critical_count = len([alert for alert in active_alerts if alert.level == "CRITICAL"])
+        # 计算整体健康状态（取最严重的指标状态，没有指标时为未知）
+        overall_status = max(
+            (metric.status for metric in self.health_metrics.values()),
+            default=HealthStatus.UNKNOWN
+        )
+        
+        # 统计告警（直接读取计数，最近告警从队尾向前查找）
+        with self._alert_lock:
+            warning_count = self._active_warning
+            critical_count = self._active_critical
+            recent_alerts = []
+            for alert in reversed(self.alerts):
+                if len(recent_alerts) == 10:
+                    break
+                if not alert.resolved:
+                    recent_alerts.append(alert)
+        recent_alerts.reverse()
         
         return {
-            'overall_status': overall_status.value,
-            'timestamp': datetime.now().isoformat(),
+            'overall_status': overall_status.label,
+            'timestamp': now.isoformat(),
             'metrics': {
                 name: {
                     'value': metric.value,
                     'unit': metric.unit,
-                    'status': metric.status.value,
+                    'status': metric.status.label,
                     'timestamp': metric.timestamp.isoformat()
                 }
                 for name, metric in self.health_metrics.items()
             },
             'alerts': {
-                'total': len(active_alerts),
+                'total': warning_count + critical_count,
                 'warning': warning_count,
                 'critical': critical_count,
                 'recent': [
@@ -330,7 +396,7 @@ class SystemMonitor:
                         'message': alert.message,
                         'timestamp': alert.timestamp.isoformat()
                     }
-                    for alert in active_alerts[-10:]  # 最近10个告警
+                    for alert in recent_alerts  # 最近10个告警
                 ]
             }
         }
@@ -340,31 +406,45 @@ class SystemMonitor:
         if not self.performance_history:
             return {'message': '暂无性能数据'}
         
-        # 计算平均值
-        cpu_values = [record.get('cpu_usage', 0) for record in self.performance_history]
-        memory_values = [record.get('memory_usage', 0) for record in self.performance_history]
+        # 一次遍历同时计算平均值和最大值
+        cpu_sum = memory_sum = 0.0
+        cpu_max = memory_max = float('-inf')
+        for record in self.performance_history:
+            cpu = record.get('cpu_usage', 0)
+            memory = record.get('memory_usage', 0)
+            cpu_sum += cpu
+            memory_sum += memory
+            if cpu > cpu_max:
+                cpu_max = cpu
+            if memory > memory_max:
+                memory_max = memory
+        count = len(self.performance_history)
         
         return {
-            'period': f"{len(self.performance_history)} 个检查周期",
-            'average_cpu': f"{sum(cpu_values) / len(cpu_values):.2f}%",
-            'average_memory': f"{sum(memory_values) / len(memory_values):.2f}%",
-            'max_cpu': f"{max(cpu_values):.2f}%",
-            'max_memory': f"{max(memory_values):.2f}%"
+            'period': f"{count} 个检查周期",
+            'average_cpu': f"{cpu_sum / count:.2f}%",
+            'average_memory': f"{memory_sum / count:.2f}%",
+            'max_cpu': f"{cpu_max:.2f}%",
+            'max_memory': f"{memory_max:.2f}%"
         }
     
     def resolve_alert(self, component: str, message: str = None):
         """解决告警"""
-        for alert in self.alerts:
-            if alert.component == component and not alert.resolved:
-                if message is None or message in alert.message:
-                    alert.resolved = True
-                    logger.info(f"告警已解决: {alert.message}")
-                    break
+        with self._alert_lock:
+            for alert in self.alerts:
+                if alert.component == component and not alert.resolved:
+                    if message is None or message in alert.message:
+                        self._release_alert(alert)
+                        logger.info(f"告警已解决: {alert.message}")
+                        break
     
     def clear_all_alerts(self):
         """清除所有告警"""
-        for alert in self.alerts:
-            alert.resolved = True
+        with self._alert_lock:
+            for alert in self.alerts:
+                alert.resolved = True
+            self._active_warning = 0
+            self._active_critical = 0
         logger.info("所有告警已清除")
 
 # =============================================================================